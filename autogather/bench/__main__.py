@@ -0,0 +1,39 @@
+import argparse
+import logging
+
+from autogather.bench import capture, compaction, corpus, executor, features, frames, prompt, pyramid, respawn, \
+    route, templates, waypoints
+
+BENCHES = {
+    "templates": templates,
+    "pyramid": pyramid,
+    "executor": executor,
+    "prompt": prompt,
+    "capture": capture,
+    "frames": frames,
+    "corpus": corpus,
+    "features": features,
+    "compaction": compaction,
+    "waypoints": waypoints,
+    "route": route,
+    "respawn": respawn,
+}
+
+
+def main(argv=None):
+    logging.basicConfig(
+        level=logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    )
+    parser = argparse.ArgumentParser(prog="python -m autogather.bench")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    for name, mod in BENCHES.items():
+        p = sub.add_parser(name, help=mod.HELP)
+        mod.add_arguments(p)
+        p.set_defaults(func=mod.run)
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
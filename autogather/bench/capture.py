@@ -0,0 +1,75 @@
+# autogather/bench/capture.py
+import cv2
+import numpy as np
+from mss.screenshot import ScreenShot
+
+from autogather.bench.scenes import time_calls
+from autogather.enums.aspect_ratio import AspectRatio
+from autogather.screen import WindowScreen, _get_selector_rectangle, selector_roi_rect
+
+HELP = "prompt ROI capture: full-window grab + convert + slice vs ROI-only grab, on a fake mss backend"
+
+
+class FakeMss:
+    # stands in for mss(): hands out a BGRA buffer of the requested size, like a real grab.
+    # reuse=True keeps one buffer per size so only the caller's allocations are left to measure.
+    def __init__(self, desktop: np.ndarray, reuse: bool = False):
+        self.desktop = desktop
+        self.reuse = reuse
+        self.grabs = 0
+        self.pixels = 0
+        self._bufs = {}
+
+    def grab(self, mon):
+        l, t, w, h = mon["left"], mon["top"], mon["width"], mon["height"]
+        self.grabs += 1
+        self.pixels += w * h
+        if not self.reuse:
+            return ScreenShot(bytearray(self.desktop[t:t + h, l:l + w].tobytes()), mon)
+        key = (l, t, w, h)
+        data = self._bufs.get(key)
+        if data is None:
+            data = self._bufs[key] = bytearray(self.desktop[t:t + h, l:l + w].tobytes())
+        return ScreenShot(data, mon)
+
+
+def fake_screen(width: int, height: int, seed: int = 1, reuse: bool = False):
+    rng = np.random.default_rng(seed)
+    desktop = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)
+    sct = FakeMss(desktop, reuse)
+    screen = WindowScreen(0, sct_factory=lambda: sct, rect_fn=lambda hwnd: (0, 0, width, height))
+    return screen, sct
+
+
+def add_arguments(p):
+    p.add_argument("--width", type=int, default=2560)
+    p.add_argument("--height", type=int, default=1440)
+    p.add_argument("--repeat", type=int, default=30)
+
+
+def _full_frame_roi(screen, ratio):
+    # _get_selector_rectangle before ROI-only capture
+    gray = cv2.cvtColor(screen.grab_bgr(), cv2.COLOR_BGR2GRAY)
+    H, W = gray.shape[:2]
+    x1, y1, x2, y2 = selector_roi_rect(W, H, ratio)
+    return gray[y1:y2, x1:x2]
+
+
+def run(args):
+    ratio = AspectRatio.RATIO_16_9
+    screen, sct = fake_screen(args.width, args.height)
+    full = _full_frame_roi(screen, ratio)
+    roi, _ = _get_selector_rectangle(screen, ratio)
+    assert np.array_equal(full, roi), "ROI-only capture differs from full-frame slice"
+
+    rows = []
+    for name, fn in (("full frame", lambda: _full_frame_roi(screen, ratio)),
+                     ("roi only", lambda: _get_selector_rectangle(screen, ratio))):
+        sct.grabs = sct.pixels = 0
+        t, _ = time_calls(fn, args.repeat)
+        rows.append((name, t, sct.pixels // sct.grabs))
+    print(f"window {args.width}x{args.height}, roi {roi.shape[1]}x{roi.shape[0]}, {args.repeat} checks")
+    print(f"{'path':<12} {'ms/check':>9} {'px grabbed':>11}")
+    for name, t, px in rows:
+        print(f"{name:<12} {t * 1000:>9.2f} {px:>11}")
+    print(f"speedup {rows[0][1] / rows[1][1]:.1f}x")
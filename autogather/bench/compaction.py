@@ -0,0 +1,83 @@
+# autogather/bench/compaction.py
+import time
+
+import numpy as np
+
+from autogather.bench.features import _run_set
+from autogather.bench.scenes import load_sets, make_scene, noisy_background, resources
+from autogather.config import SCALES, COMPACTION_SIMILARITY
+from autogather.folder_utils import _resource_strategy
+from autogather.model.compaction import compact
+from autogather.model.templates import TemplateSet
+
+HELP = "resource template compaction: which templates are kept, work saved, speed and recall vs the full set"
+
+
+def add_arguments(p):
+    p.add_argument("--resource", help="folder name under resources/ (default: all)")
+    p.add_argument("--threshold", type=float, default=COMPACTION_SIMILARITY)
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--per-template", type=int, default=3, help="scenes per original template")
+    p.add_argument("--negatives", type=int, default=2)
+    p.add_argument("--clusters", action="store_true", help="list the kept and dropped files, no matching")
+    p.add_argument("--seed", type=int, default=1)
+
+
+def _print_clusters(res, full, comp):
+    names = [n for n, _, _ in full._folder_signature()]
+    print(f"{res.folder_name}: {len(comp.clusters)}/{len(full.tmps)} kept")
+    for c in comp.clusters:
+        covered = ", ".join(f"{names[j]} ({comp.matrix[c[0], j]:.2f})" for j in c[1:])
+        print(f"  {names[c[0]]:<14} covers {covered}" if covered else f"  {names[c[0]]}")
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    lo, hi = min(SCALES), max(SCALES)
+    if not args.clusters:
+        print(f"frame {args.width}x{args.height}, scales uniform in [{lo}, {hi}], similarity >= {args.threshold}, "
+              f"{args.per_template} scenes per template + {args.negatives} negatives")
+        print(f"{'resource':<20} {'tmps':>7} {'pairs':>9} {'full ms':>8} {'recall':>7} {'fp':>3} "
+              f"{'compact ms':>11} {'recall':>7} {'fp':>3} {'speedup':>8}")
+    totals = {"full": [0.0, 0, 0], "compact": [0.0, 0, 0], "pairs": [0, 0], "positives": 0}
+    for res in resources(args.resource):
+        directory = load_sets(res)[3].directory
+        full = TemplateSet(directory, strategy=_resource_strategy())
+        t0 = time.perf_counter()
+        comp = compact(full.tmps, args.threshold)
+        cost = time.perf_counter() - t0
+        if args.clusters:
+            _print_clusters(res, full, comp)
+            continue
+        # no directory, so the picked templates aren't reloaded from the folder
+        small = TemplateSet(None, strategy=_resource_strategy())
+        small.tmps = [full.tmps[i] for i in comp.keep]
+        scenes = []
+        for tmp in full.tmps:
+            for _ in range(args.per_template):
+                frame, truth = make_scene(tmp, float(rng.uniform(lo, hi)), args.width, args.height, rng)
+                if truth:
+                    scenes.append((frame, truth))
+        positives = len(scenes)
+        scenes += [(noisy_background(args.width, args.height, rng), None) for _ in range(args.negatives)]
+        f = _run_set(full, scenes)
+        c = _run_set(small, scenes)
+        for name, r in (("full", f), ("compact", c)):
+            totals[name][0] += r["ms"]
+            totals[name][1] += r["tp"]
+            totals[name][2] += r["fp"]
+        totals["pairs"][0] += len(full.tmps) * len(SCALES)
+        totals["pairs"][1] += len(small.tmps) * len(SCALES)
+        totals["positives"] += positives
+        print(f"{res.folder_name:<20} {len(small.tmps):>3}/{len(full.tmps):<3} "
+              f"{len(small.tmps) * len(SCALES):>4}/{len(full.tmps) * len(SCALES):<4} "
+              f"{f['ms']:>8.1f} {f['tp']:>3}/{positives:<3} {f['fp']:>3} "
+              f"{c['ms']:>11.1f} {c['tp']:>3}/{positives:<3} {c['fp']:>3} {f['ms'] / c['ms']:>7.2f}x"
+              f"  compacted in {cost * 1000:.0f} ms")
+    if args.clusters:
+        return
+    (fm, ftp, ffp), (cm, ctp, cfp) = totals["full"], totals["compact"]
+    (pf, pc), n = totals["pairs"], totals["positives"]
+    print(f"{'total':<20} {'':>7} {pc:>4}/{pf:<4} {fm:>8.1f} {ftp:>3}/{n:<3} {ffp:>3} "
+          f"{cm:>11.1f} {ctp:>3}/{n:<3} {cfp:>3} {fm / cm if cm else 0:>7.2f}x")
@@ -0,0 +1,136 @@
+# autogather/bench/corpus.py
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from autogather.bench.scenes import ROI_SIZE, load_sets, make_scene, noisy_background, percentile, resources
+from autogather.config import (
+    SCALES, MATCH_THRESHOLD, RESOURCE_THRESHOLD, ADAPTIVE_SCALES, RESOURCE_COARSE_TO_FINE,
+    TEMPLATE_COMPACTION_ENABLED
+)
+from autogather.model.templates import TemplateSet
+
+HELP = "best_match speed and accuracy over every resource under resources/, as JSON"
+
+
+def add_arguments(p):
+    p.add_argument("--resource", help="folder name under resources/ (default: all)")
+    p.add_argument("--positives", type=int, default=8, help="scenes with a template pasted, per template set")
+    p.add_argument("--negatives", type=int, default=4, help="background-only scenes, per template set")
+    p.add_argument("--width", type=int, default=1280, help="frame size for resource templates")
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--seed", type=int, default=1)
+    p.add_argument("--out", help="write the JSON report here")
+    p.add_argument("--json", action="store_true", help="print the JSON report instead of the table")
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _center_inside(box, truth) -> bool:
+    # several sets hold crops of one another, so a correct hit need not cover the pasted box;
+    # Worker only uses the hit's centre
+    (x1, y1), (x2, y2) = box
+    (tx1, ty1), (tx2, ty2) = truth
+    cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+    return tx1 <= cx <= tx2 and ty1 <= cy <= ty2
+
+
+def _measure(ts, size, threshold, fixed_scale, args, rng, pasted=None) -> dict:
+    # prompt sets are matched inside the prompt ROI, resource sets on the whole frame, as in Worker.
+    # Prompt UI keeps one scale for a given window, resources change size with distance.
+    # Positives are pasted from `pasted` (default: the set's own templates), so templates a compacted
+    # set dropped still count against its recall.
+    pasted = ts.tmps if pasted is None else pasted
+    w, h = size
+    session_scale = float(rng.choice(SCALES))
+    samples = []
+    tp = fp = fn = 0
+    scenes = [True] * args.positives + [False] * args.negatives
+    for positive in scenes:
+        if positive:
+            tmp = pasted[int(rng.integers(0, len(pasted)))]
+            scale = session_scale if fixed_scale else float(rng.choice(SCALES))
+            frame, truth = make_scene(tmp, scale, w, h, rng)
+        else:
+            frame, truth = noisy_background(w, h, rng), None
+        t0 = time.perf_counter()
+        hit = ts.best_match(frame, SCALES, threshold)
+        samples.append(time.perf_counter() - t0)
+        if hit and truth and _center_inside(hit["box"], truth):
+            tp += 1
+        else:
+            fp += hit is not None
+            fn += truth is not None
+    total = sum(samples)
+    return {
+        "templates": len(ts.tmps),
+        "folder_templates": len(pasted),
+        "frame": [w, h],
+        "threshold": threshold,
+        "calls": len(samples),
+        "matches_per_sec": round(len(samples) / total, 2) if total > 0 else None,
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "tp": tp,
+        "fp": fp,
+        "fn": fn,
+        "precision": round(tp / (tp + fp), 3) if tp + fp else None,
+        "recall": round(tp / (tp + fn), 3) if tp + fn else None,
+    }
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "seed": args.seed,
+        "config": {
+            "scales": SCALES,
+            "match_threshold": MATCH_THRESHOLD,
+            "resource_threshold": RESOURCE_THRESHOLD,
+            "adaptive_scales": ADAPTIVE_SCALES,
+            "resource_coarse_to_fine": RESOURCE_COARSE_TO_FINE,
+            "template_compaction": TEMPLATE_COMPACTION_ENABLED,
+        },
+        "resources": {},
+    }
+    for res in resources(args.resource):
+        ts_f, ts_g, ts_s, ts_r = load_sets(res)
+        # every image in the resource folder, not just the ones compaction kept
+        folder = TemplateSet(ts_r.directory).tmps if ts_r is not None else None
+        cases = (("focused", ts_f, ROI_SIZE, MATCH_THRESHOLD, True, None),
+                 ("gathering", ts_g, ROI_SIZE, MATCH_THRESHOLD, True, None),
+                 ("selector", ts_s, ROI_SIZE, MATCH_THRESHOLD, True, None),
+                 ("resource", ts_r, (args.width, args.height), RESOURCE_THRESHOLD, False, folder))
+        report["resources"][res.folder_name] = {
+            name: _measure(ts, size, thr, fixed, args, rng, pasted)
+            for name, ts, size, thr, fixed, pasted in cases if ts is not None and ts.tmps
+        }
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+        return
+    print(f"{'resource':<20} {'set':<10} {'tmps':>7} {'match/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'prec':>5} {'recall':>6}")
+    for name, sets in report["resources"].items():
+        for set_name, m in sets.items():
+            prec = "-" if m["precision"] is None else f"{m['precision']:.2f}"
+            rec = "-" if m["recall"] is None else f"{m['recall']:.2f}"
+            tmps = f"{m['templates']}/{m['folder_templates']}"
+            print(f"{name:<20} {set_name:<10} {tmps:>7} {m['matches_per_sec']:>8.1f} "
+                  f"{m['p50_ms']:>8.1f} {m['p95_ms']:>8.1f} {prec:>5} {rec:>6}")
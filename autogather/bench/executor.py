@@ -0,0 +1,43 @@
+# autogather/bench/executor.py
+import os
+
+import numpy as np
+
+from autogather.bench.scenes import ROI_SIZE, load_sets, make_scene, noisy_background, resources, time_calls
+from autogather.config import MATCH_THRESHOLD, RESOURCE_THRESHOLD, SCALES
+from autogather.model.match_executor import MatchExecutor
+from autogather.model.templates import TemplateSet
+
+HELP = "prompt and resource matching through MatchExecutor at different pool sizes"
+
+
+def add_arguments(p):
+    p.add_argument("--resource", default="baru_rich_ore", help="folder name under resources/")
+    p.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--repeat", type=int, default=5)
+    p.add_argument("--seed", type=int, default=1)
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    res = resources(args.resource)[0]
+    # plain sets: adaptive scales would hide the fan-out after the first call
+    prompt_sets = [TemplateSet(ts.directory) for ts in load_sets(res)[:3]]
+    ts_r = load_sets(res)[3]
+    roi = noisy_background(*ROI_SIZE, rng)
+    frame, _ = make_scene(ts_r.tmps[0], 1.0, args.width, args.height, rng)
+
+    print(f"{res.folder_name}: {os.cpu_count()} cores visible, {args.repeat} calls per case")
+    print(f"{'workers':>7} {'prompt ms':>10} {'speedup':>8} {'resource ms':>12} {'speedup':>8}")
+    base = None
+    for w in args.workers:
+        ex = MatchExecutor(w)
+        prompt_t, _ = time_calls(lambda: ex.best_matches(roi, prompt_sets, SCALES, MATCH_THRESHOLD), args.repeat)
+        res_t, _ = time_calls(lambda: ex.best_match(frame, ts_r, SCALES, RESOURCE_THRESHOLD), args.repeat)
+        ex.shutdown()
+        if base is None:
+            base = (prompt_t, res_t)
+        print(f"{w:>7} {prompt_t * 1000:>10.2f} {base[0] / prompt_t:>7.2f}x "
+              f"{res_t * 1000:>12.2f} {base[1] / res_t:>7.2f}x")
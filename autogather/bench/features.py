@@ -0,0 +1,71 @@
+# autogather/bench/features.py
+import time
+
+import numpy as np
+
+from autogather.bench.corpus import _center_inside
+from autogather.bench.scenes import load_sets, make_scene, noisy_background, resources
+from autogather.config import RESOURCE_THRESHOLD, SCALES
+from autogather.enums.match_strategy import MatchStrategy
+from autogather.model.templates import TemplateSet
+
+HELP = "resource detection: coarse-to-fine scale scan vs ORB keypoints, at scales between the listed SCALES"
+
+
+def add_arguments(p):
+    p.add_argument("--resource", help="folder name under resources/ (default: all)")
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--positives", type=int, default=6)
+    p.add_argument("--negatives", type=int, default=2)
+    p.add_argument("--keypoint-only", action="store_true",
+                   help="paste only templates that have enough keypoints for the feature path")
+    p.add_argument("--seed", type=int, default=1)
+
+
+def _run_set(ts, scenes) -> dict:
+    elapsed = 0.0
+    tp = fp = 0
+    for frame, truth in scenes:
+        t0 = time.perf_counter()
+        hit = ts.best_match(frame, SCALES, RESOURCE_THRESHOLD)
+        elapsed += time.perf_counter() - t0
+        if hit and truth and _center_inside(hit["box"], truth):
+            tp += 1
+        elif hit:
+            fp += 1
+    return {"ms": elapsed / len(scenes) * 1000, "tp": tp, "fp": fp}
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    lo, hi = min(SCALES), max(SCALES)
+    print(f"frame {args.width}x{args.height}, scales uniform in [{lo}, {hi}], "
+          f"{args.positives}+{args.negatives} scenes per resource")
+    print(f"{'resource':<20} {'keypt tmps':>10} {'pyramid ms':>11} {'recall':>7} {'fp':>3} "
+          f"{'features ms':>12} {'recall':>7} {'fp':>3} {'speedup':>8}")
+    totals = {"pyramid": [0.0, 0, 0], "features": [0.0, 0, 0]}
+    for res in resources(args.resource):
+        ts_r = load_sets(res)[3]
+        pyramid = TemplateSet(ts_r.directory, strategy=MatchStrategy.PYRAMID)
+        features = TemplateSet(ts_r.directory, strategy=MatchStrategy.FEATURES)
+        pool = features.features.usable if args.keypoint_only else range(len(pyramid.tmps))
+        if not pool:
+            continue
+        scenes = []
+        for _ in range(args.positives):
+            tmp = pyramid.tmps[int(rng.choice(pool))]
+            scenes.append(make_scene(tmp, float(rng.uniform(lo, hi)), args.width, args.height, rng))
+        scenes += [(noisy_background(args.width, args.height, rng), None) for _ in range(args.negatives)]
+        p = _run_set(pyramid, scenes)
+        f = _run_set(features, scenes)
+        for name, r in (("pyramid", p), ("features", f)):
+            totals[name][0] += r["ms"]
+            totals[name][1] += r["tp"]
+            totals[name][2] += r["fp"]
+        print(f"{res.folder_name:<20} {len(features.features.usable):>4}/{len(features.tmps):<5} "
+              f"{p['ms']:>11.1f} {p['tp']:>3}/{args.positives:<3} {p['fp']:>3} "
+              f"{f['ms']:>12.1f} {f['tp']:>3}/{args.positives:<3} {f['fp']:>3} {p['ms'] / f['ms']:>7.2f}x")
+    (pm, ptp, pfp), (fm, ftp, ffp) = totals["pyramid"], totals["features"]
+    print(f"{'total':<20} {'':>10} {pm:>11.1f} {ptp:>7} {pfp:>3} {fm:>12.1f} {ftp:>7} {ffp:>3} "
+          f"{pm / fm if fm else 0:>7.2f}x")
@@ -0,0 +1,55 @@
+# autogather/bench/frames.py
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from autogather.bench.capture import fake_screen
+from autogather.bench.scenes import time_calls
+from autogather.enums.aspect_ratio import AspectRatio
+from autogather.screen import _get_selector_rectangle
+
+HELP = "per-frame allocations (tracemalloc) of the grab -> grayscale pipeline, copy-based vs reused buffers"
+
+
+def add_arguments(p):
+    p.add_argument("--width", type=int, default=2560)
+    p.add_argument("--height", type=int, default=1440)
+    p.add_argument("--frames", type=int, default=30)
+
+
+def _copy_pipeline(screen):
+    # grab_bgr + cvtColor as the worker did before
+    left, top, right, bottom = screen.geometry.rect()
+    img = screen._sct().grab({"left": left, "top": top, "width": right - left, "height": bottom - top})
+    return cv2.cvtColor(np.array(img)[:, :, :3], cv2.COLOR_BGR2GRAY)
+
+
+def _allocated(fn, frames: int):
+    fn()  # first frame sizes the reused buffers
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(frames):
+        fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak - base
+
+
+def run(args):
+    screen, _ = fake_screen(args.width, args.height, reuse=True)
+    ratio = AspectRatio.RATIO_16_9
+    assert np.array_equal(_copy_pipeline(screen), screen.grab_gray())
+
+    cases = (
+        ("full, copy", lambda: _copy_pipeline(screen)),
+        ("full, reuse", screen.grab_gray),
+        ("roi, reuse", lambda: _get_selector_rectangle(screen, ratio)),
+    )
+    print(f"window {args.width}x{args.height}, {args.frames} frames, fake mss with a reused grab buffer")
+    print(f"{'pipeline':<12} {'ms/frame':>9} {'peak alloc KiB':>15}")
+    for name, fn in cases:
+        t, _ = time_calls(fn, args.frames)
+        peak = _allocated(fn, args.frames)
+        print(f"{name:<12} {t * 1000:>9.2f} {peak / 1024:>15.1f}")
@@ -0,0 +1,51 @@
+# autogather/bench/prompt.py
+import numpy as np
+
+from autogather.bench.scenes import ROI_SIZE, load_sets, noisy_background, paste, resources, time_calls
+from autogather.config import MATCH_THRESHOLD, SCALES
+from autogather.model.match_executor import MatchExecutor
+from autogather.model.prompt_detector import PromptDetector
+from autogather.model.templates import TemplateSet
+
+HELP = "prompt check: three separate best_match calls vs PromptDetector.detect, and the unchanged-ROI gate"
+
+
+def add_arguments(p):
+    p.add_argument("--resource", help="folder name under resources/ (default: all)")
+    p.add_argument("--repeat", type=int, default=10)
+    p.add_argument("--seed", type=int, default=1)
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    w, h = ROI_SIZE
+    ex = MatchExecutor(1)
+    print(f"{'resource':<20} {'case':<10} {'3 calls ms':>11} {'detect ms':>10} {'same':>5} {'gated ms':>9} {'reuse':>6}")
+    for res in resources(args.resource):
+        sets = [TemplateSet(ts.directory) for ts in load_sets(res)[:3]]
+        if not (sets[1].tmps and sets[2].tmps):
+            continue
+        empty = noisy_background(w, h, rng)
+        prompt = empty.copy()
+        sel = sets[2].tmps[0]
+        if sel.shape[1] >= w or sel.shape[0] >= h:
+            continue
+        paste(prompt, sets[1].tmps[0], 1.0, 0, 0)
+        paste(prompt, sel, 1.0, w - sel.shape[1], h - sel.shape[0])
+        detector = PromptDetector(*sets, ex, diff_tolerance=None)
+        for case, roi in (("empty", empty), ("prompt", prompt)):
+            separate = []
+            sep_t, _ = time_calls(
+                lambda: separate.append([ts.best_match(roi, SCALES, MATCH_THRESHOLD) for ts in sets]), args.repeat)
+            det_t, _ = time_calls(lambda: detector.detect(roi), args.repeat)
+            hits = detector.detect(roi)
+            f, g, s = separate[-1]
+            same = bool((f or g) and s) == hits.any_prompt
+            # idle character: the same ROI with a little sensor noise on every check
+            gated = PromptDetector(*sets, ex)
+            frames = [np.clip(roi.astype(np.int16) + rng.integers(-2, 3, roi.shape), 0, 255).astype(np.uint8)
+                      for _ in range(args.repeat)]
+            it = iter(frames)
+            gate_t, _ = time_calls(lambda: gated.detect(next(it)), args.repeat)
+            print(f"{res.folder_name:<20} {case:<10} {sep_t * 1000:>11.2f} {det_t * 1000:>10.2f} {str(same):>5} "
+                  f"{gate_t * 1000:>9.2f} {gated.hit_rate():>6.0%}")
@@ -0,0 +1,45 @@
+# autogather/bench/pyramid.py
+import numpy as np
+
+from autogather.bench.scenes import load_sets, make_scene, resources, time_calls
+from autogather.config import RESOURCE_THRESHOLD, SCALES
+from autogather.enums.match_strategy import MatchStrategy
+from autogather.model.templates import TemplateSet
+
+HELP = "full-frame resource detection: full-resolution scan vs coarse-to-fine pyramid"
+
+
+def add_arguments(p):
+    p.add_argument("--resource", help="folder name under resources/ (default: all)")
+    p.add_argument("--width", type=int, default=1280)
+    p.add_argument("--height", type=int, default=720)
+    p.add_argument("--scenes", type=int, default=5)
+    p.add_argument("--seed", type=int, default=1)
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    print(f"frame {args.width}x{args.height}, {args.scenes} scenes per resource")
+    print(f"{'resource':<20} {'tmps':>4} {'full ms':>10} {'pyramid ms':>11} {'speedup':>8} {'same box':>9}")
+    for res in resources(args.resource):
+        ts_r = load_sets(res)[3]
+        full = TemplateSet(ts_r.directory)
+        pyramid = TemplateSet(ts_r.directory, strategy=MatchStrategy.PYRAMID)
+        if not full.tmps:
+            continue
+        full_t = pyr_t = 0.0
+        same = 0
+        for _ in range(args.scenes):
+            tmp = full.tmps[int(rng.integers(0, len(full.tmps)))]
+            frame, _ = make_scene(tmp, float(rng.choice(SCALES)), args.width, args.height, rng)
+            hits = {}
+            for name, ts in (("full", full), ("pyramid", pyramid)):
+                t, _ = time_calls(lambda: hits.__setitem__(name, ts.best_match(frame, SCALES, RESOURCE_THRESHOLD)), 1)
+                if name == "full":
+                    full_t += t
+                else:
+                    pyr_t += t
+            a, b = hits["full"], hits["pyramid"]
+            same += (a is None and b is None) or (a is not None and b is not None and a["box"] == b["box"])
+        print(f"{res.folder_name:<20} {len(full.tmps):>4} {full_t / args.scenes * 1000:>10.1f} "
+              f"{pyr_t / args.scenes * 1000:>11.1f} {full_t / pyr_t:>7.2f}x {same:>5}/{args.scenes}")
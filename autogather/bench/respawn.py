@@ -0,0 +1,80 @@
+# autogather/bench/respawn.py
+import numpy as np
+
+from autogather import clock
+from autogather.bench.route import _SimClock
+from autogather.config import NODE_MIN_REVISIT_SEC
+from autogather.enums.resource import Resource
+from autogather.model.navigator import Navigator
+from autogather.model.resource_model import ResourceObject
+from autogather.model.route_planner import RoutePlanner
+from autogather.model.waypoints import WaypointDB
+
+HELP = "gathers per hour when the true respawn differs from NODE_MIN_REVISIT_SEC: fixed vs learned respawn"
+
+
+def add_arguments(p):
+    p.add_argument("--nodes", type=int, default=16)
+    p.add_argument("--area", type=int, default=3000, help="side of the square field, navigator px")
+    p.add_argument("--hours", type=float, default=1.0)
+    p.add_argument("--service", type=float, default=4.0, help="seconds per gather, F press to done")
+    p.add_argument("--respawn", type=float, nargs="+", default=[20.0, 45.0, 90.0, 240.0],
+                   help="true respawn seconds of the simulated nodes")
+    p.add_argument("--seed", type=int, default=1)
+
+
+def _simulate(points, learn: bool, respawn: float, args) -> dict:
+    sim = _SimClock()
+    clock.install(sim)
+    try:
+        res = Resource.BARU_ORE
+        nav = Navigator(ResourceObject(res.folder_name, res.get_mult_x(), res.get_mult_y(), 0, 0))
+        db = WaypointDB(NODE_MIN_REVISIT_SEC, learn=learn)
+        gathered_at = {}
+        for x, y in points:
+            gathered_at[db.add_or_update(x, y, sim.now() - respawn)] = sim.now() - respawn
+        planner = RoutePlanner(db, nav, args.service)
+        x = y = 0
+        gathered = wasted = 0
+        idle = 0.0
+        end = sim.now() + args.hours * 3600
+        while sim.now() < end:
+            n = planner.next(x, y)
+            if n is None:
+                # the worker would scan the screen here; count it as idle
+                sim.sleep(1.0)
+                idle += 1.0
+                continue
+            sim.sleep(planner.travel_sec(x, y, n.x, n.y))
+            x, y = n.x, n.y
+            present = sim.now() - gathered_at[n] >= respawn
+            if present:
+                sim.sleep(args.service)
+                gathered_at[n] = sim.now()
+                gathered += 1
+                db.add_or_update(n.x, n.y)
+            else:
+                wasted += 1
+            db.observe(n, present)
+        hours = args.hours
+        stats = db.respawn_stats()["resource"]
+        return {"per_hour": gathered / hours, "wasted_per_hour": wasted / hours,
+                "idle_share": idle / (hours * 3600), "nodes_left": len(db), "estimate": stats["estimate_sec"]}
+    finally:
+        clock.install(clock.RealClock())
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    points = [(int(x), int(y)) for x, y in rng.integers(-args.area // 2, args.area // 2, (args.nodes, 2))]
+    print(f"{args.nodes} nodes, field {args.area}x{args.area} px, gather {args.service}s, "
+          f"prior {NODE_MIN_REVISIT_SEC}s")
+    print(f"{'respawn':>7} {'fixed /h':>9} {'wasted':>7} {'left':>5} {'learned /h':>11} {'wasted':>7} "
+          f"{'left':>5} {'estimate':>9} {'gain':>6}")
+    for respawn in args.respawn:
+        f = _simulate(points, False, respawn, args)
+        l = _simulate(points, True, respawn, args)
+        gain = f"{l['per_hour'] / f['per_hour'] - 1:>+6.0%}" if f["per_hour"] else f"{'n/a':>6}"
+        print(f"{respawn:>6.0f}s {f['per_hour']:>9.0f} {f['wasted_per_hour']:>7.0f} {f['nodes_left']:>5} "
+              f"{l['per_hour']:>11.0f} {l['wasted_per_hour']:>7.0f} {l['nodes_left']:>5} "
+              f"{l['estimate']:>8.0f}s {gain}")
@@ -0,0 +1,95 @@
+# autogather/bench/route.py
+import numpy as np
+
+from autogather import clock
+from autogather.config import NODE_MIN_REVISIT_SEC, DIAGONAL_MULT
+from autogather.enums.resource import Resource
+from autogather.model.navigator import Navigator
+from autogather.model.resource_model import ResourceObject
+from autogather.model.route_planner import RoutePlanner
+from autogather.model.waypoints import WaypointDB
+
+HELP = "nodes gathered per hour on a simulated node field: greedy nearest-ready vs RoutePlanner"
+
+
+def add_arguments(p):
+    p.add_argument("--nodes", type=int, nargs="+", default=[8, 16, 32])
+    p.add_argument("--area", type=int, default=3000, help="side of the square field, navigator px")
+    p.add_argument("--hours", type=float, default=1.0)
+    p.add_argument("--service", type=float, default=4.0, help="seconds per gather, F press to done")
+    p.add_argument("--respawn", type=float, nargs="+", default=[NODE_MIN_REVISIT_SEC, 120.0])
+    p.add_argument("--diag-mult", type=float, default=DIAGONAL_MULT, help="0 moves one axis at a time")
+    p.add_argument("--fields", type=int, default=4, help="random node fields averaged per row")
+    p.add_argument("--seed", type=int, default=1)
+
+
+class _SimClock:
+    # virtual time only; travel and gathering are modelled with sleep()
+    def __init__(self):
+        self.t = 1_000_000.0
+
+    def now(self) -> float:
+        return self.t
+
+    def sleep(self, sec: float):
+        self.t += max(0.0, sec)
+
+
+def _simulate(points, planned: bool, respawn: float, args) -> dict:
+    sim = _SimClock()
+    clock.install(sim)
+    try:
+        res = Resource.BARU_ORE
+        nav = Navigator(ResourceObject(res.folder_name, res.get_mult_x(), res.get_mult_y(), 0, 0,
+                                       diag_mult_x=args.diag_mult, diag_mult_y=args.diag_mult))
+        db = WaypointDB(respawn, learn=False)
+        for x, y in points:
+            db.add_or_update(x, y, sim.now() - respawn)
+        planner = RoutePlanner(db, nav, args.service)
+        x = y = 0
+        gathered = 0
+        travel = idle = 0.0
+        end = sim.now() + args.hours * 3600
+        while sim.now() < end:
+            n = planner.next(x, y) if planned else db.next_available(x, y)
+            if n is None:
+                # the worker would scan the screen here; count it as idle
+                sim.sleep(1.0)
+                idle += 1.0
+                continue
+            leg = planner.travel_sec(x, y, n.x, n.y)
+            sim.sleep(leg)
+            travel += leg
+            wait = max(0.0, db.ready_at(n) - sim.now())
+            sim.sleep(wait)
+            idle += wait
+            sim.sleep(args.service)
+            x, y = n.x, n.y
+            gathered += 1
+            db.add_or_update(n.x, n.y)
+        hours = args.hours
+        return {"per_hour": gathered / hours, "travel_share": travel / (hours * 3600),
+                "idle_share": idle / (hours * 3600)}
+    finally:
+        clock.install(clock.RealClock())
+
+
+def _mean(runs) -> dict:
+    return {k: sum(r[k] for r in runs) / len(runs) for k in runs[0]}
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    print(f"field {args.area}x{args.area} px, gather {args.service}s, {args.fields} fields per row")
+    print(f"{'respawn':>7} {'nodes':>6} {'greedy /h':>10} {'travel':>7} {'idle':>6} {'planned /h':>11} {'travel':>7} {'idle':>6} {'gain':>6}")
+    for respawn in args.respawn:
+        for count in args.nodes:
+            greedy, planned = [], []
+            for _ in range(args.fields):
+                points = [(int(x), int(y)) for x, y in rng.integers(-args.area // 2, args.area // 2, (count, 2))]
+                greedy.append(_simulate(points, False, respawn, args))
+                planned.append(_simulate(points, True, respawn, args))
+            g, p = _mean(greedy), _mean(planned)
+            print(f"{respawn:>6.0f}s {count:>6} {g['per_hour']:>10.0f} {g['travel_share']:>6.0%} "
+                  f"{g['idle_share']:>6.0%} {p['per_hour']:>11.0f} {p['travel_share']:>6.0%} "
+                  f"{p['idle_share']:>6.0%} {p['per_hour'] / g['per_hour'] - 1:>+6.0%}")
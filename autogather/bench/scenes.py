@@ -0,0 +1,64 @@
+# autogather/bench/scenes.py
+import time
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from autogather.config import PROMPT_ROI
+from autogather.enums.resource import Resource
+from autogather.folder_utils import load_resource_dir, scan_resources
+
+# PROMPT_ROI of a 2560x1440 window
+ROI_SIZE = (int(2560 * (PROMPT_ROI[2] - PROMPT_ROI[0])), int(1440 * (PROMPT_ROI[3] - PROMPT_ROI[1])))
+
+
+def noisy_background(w: int, h: int, rng: np.random.Generator) -> np.ndarray:
+    base = rng.normal(110, 45, (h // 8 + 1, w // 8 + 1)).astype(np.float32)
+    base = cv2.resize(base, (w, h), interpolation=cv2.INTER_CUBIC)
+    base += rng.normal(0, 12, (h, w)).astype(np.float32)
+    return np.clip(base, 0, 255).astype(np.uint8)
+
+
+def paste(scene: np.ndarray, template: np.ndarray, scale: float, x: int, y: int):
+    tw, th = int(template.shape[1] * scale), int(template.shape[0] * scale)
+    t = cv2.resize(template, (tw, th), interpolation=cv2.INTER_AREA)
+    scene[y:y + th, x:x + tw] = t
+    return (x, y), (x + tw, y + th)
+
+
+def make_scene(template: np.ndarray, scale: float, w: int, h: int, rng: np.random.Generator):
+    scene = noisy_background(w, h, rng)
+    tw, th = int(template.shape[1] * scale), int(template.shape[0] * scale)
+    if tw >= w or th >= h:
+        return scene, None
+    x = int(rng.integers(0, w - tw))
+    y = int(rng.integers(0, h - th))
+    return scene, paste(scene, template, scale, x, y)
+
+
+def resources(name: str = None) -> List[Resource]:
+    found = scan_resources()
+    if name:
+        found = [r for r in found if r.folder_name == name]
+        if not found:
+            raise SystemExit(f"Unknown resource: {name}")
+    return sorted(found, key=lambda r: r.folder_name)
+
+
+def load_sets(res: Resource):
+    return load_resource_dir(res.folder_name, res)
+
+
+def time_calls(fn, repeat: int) -> Tuple[float, List[float]]:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return sum(samples) / len(samples), samples
+
+
+def percentile(samples: List[float], q: float) -> float:
+    return float(np.percentile(samples, q)) if samples else 0.0
+
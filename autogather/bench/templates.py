@@ -0,0 +1,74 @@
+# autogather/bench/templates.py
+import cv2
+import numpy as np
+
+from autogather.bench.scenes import ROI_SIZE, load_sets, make_scene, noisy_background, resources, time_calls
+from autogather.config import MATCH_THRESHOLD, SCALES
+from autogather.model.templates import TemplateSet
+
+HELP = "per-call cost of TemplateSet.best_match on a prompt ROI: resize per call vs cached pyramid, full vs adaptive scales"
+
+
+def add_arguments(p):
+    p.add_argument("--resource", help="folder name under resources/ (default: all)")
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--seed", type=int, default=1)
+
+
+def _best_match_resize_each_call(ts, gray_roi, scales, threshold):
+    # TemplateSet.best_match as it was before the pyramid cache
+    best = None
+    H, W = gray_roi.shape[:2]
+    for g in ts.tmps:
+        for s in scales:
+            tw, th = int(g.shape[1] * s), int(g.shape[0] * s)
+            if tw < 12 or th < 12 or tw >= W or th >= H:
+                continue
+            t = cv2.resize(g, (tw, th), interpolation=cv2.INTER_AREA)
+            res = cv2.matchTemplate(gray_roi, t, cv2.TM_CCOEFF_NORMED)
+            _, mx, _, ml = cv2.minMaxLoc(res)
+            if mx >= threshold:
+                cand = {"score": float(mx), "box": (ml, (ml[0] + tw, ml[1] + th))}
+                if not best or cand["score"] > best["score"]:
+                    best = cand
+                    if best["score"] >= 0.9:
+                        return best
+    return best
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    w, h = ROI_SIZE
+    print(f"ROI {w}x{h}, {len(SCALES)} scales, {args.repeat} calls per case")
+    print(f"{'resource':<20} {'set':<10} {'tmps':>4} {'before ms':>10} {'after ms':>10} {'speedup':>8}")
+    for res in resources(args.resource):
+        ts_f, ts_g, ts_s, _ = load_sets(res)
+        for label, ts in (("focused", ts_f), ("gathering", ts_g), ("selector", ts_s)):
+            if not ts.tmps:
+                continue
+            # prompt absent: the common case, every (template, scale) pair is tried
+            roi = noisy_background(w, h, rng)
+            ts.best_match(roi, SCALES, MATCH_THRESHOLD)
+            before, _ = time_calls(lambda: _best_match_resize_each_call(ts, roi, SCALES, MATCH_THRESHOLD),
+                                   args.repeat)
+            after, _ = time_calls(lambda: ts.best_match(roi, SCALES, MATCH_THRESHOLD), args.repeat)
+            print(f"{res.folder_name:<20} {label:<10} {len(ts.tmps):>4} "
+                  f"{before * 1000:>10.2f} {after * 1000:>10.2f} {before / after:>7.2f}x")
+
+    print()
+    print("prompt present at scale 1.00, full scan vs adaptive scales")
+    print(f"{'resource':<20} {'set':<10} {'full ms':>10} {'adapt ms':>10} {'hits':>5} {'misses':>6} {'skipped':>8}")
+    for res in resources(args.resource):
+        for label, ts in zip(("focused", "gathering", "selector"), load_sets(res)[:3]):
+            if not ts.tmps:
+                continue
+            roi, box = make_scene(ts.tmps[-1], 1.0, w, h, rng)
+            if box is None:
+                continue
+            full = TemplateSet(ts.directory)
+            adaptive = TemplateSet(ts.directory, adaptive=True)
+            full_t, _ = time_calls(lambda: full.best_match(roi, SCALES, MATCH_THRESHOLD), args.repeat)
+            adapt_t, _ = time_calls(lambda: adaptive.best_match(roi, SCALES, MATCH_THRESHOLD), args.repeat)
+            st = adaptive.stats
+            print(f"{res.folder_name:<20} {label:<10} {full_t * 1000:>10.2f} {adapt_t * 1000:>10.2f} "
+                  f"{st['hits']:>5} {st['misses']:>6} {st['pairs_skipped']:>8}")
@@ -0,0 +1,93 @@
+# autogather/bench/waypoints.py
+import time
+
+import numpy as np
+
+from autogather import clock
+from autogather.bench.scenes import percentile
+from autogather.config import NODE_MIN_REVISIT_SEC, NODE_MERGE_RADIUS_PX
+from autogather.model.waypoints import Node, WaypointDB
+
+HELP = "WaypointDB add_or_update / next_available: linear scan vs grid index with a cooldown heap"
+
+
+def add_arguments(p):
+    p.add_argument("--nodes", type=int, nargs="+", default=[10_000, 100_000])
+    p.add_argument("--queries", type=int, default=200)
+    p.add_argument("--seed", type=int, default=1)
+
+
+class _LinearDB:
+    # WaypointDB as it was before the index
+    def __init__(self):
+        self.nodes = []
+
+    def add_or_update(self, x, y, t):
+        r2 = NODE_MERGE_RADIUS_PX * NODE_MERGE_RADIUS_PX
+        best_i, best_d2 = -1, 10 ** 12
+        for i, n in enumerate(self.nodes):
+            d2 = (n.x - x) ** 2 + (n.y - y) ** 2
+            if d2 < best_d2:
+                best_d2, best_i = d2, i
+        if best_i >= 0 and best_d2 <= r2:
+            n = self.nodes[best_i]
+            n.x, n.y, n.last_collected = int((n.x + x) / 2), int((n.y + y) / 2), t
+        else:
+            self.nodes.append(Node(x=x, y=y, last_collected=t))
+
+    def next_available(self, curx, cury, now):
+        best, best_d2 = None, float("inf")
+        for n in self.nodes:
+            if now - n.last_collected < NODE_MIN_REVISIT_SEC:
+                continue
+            d2 = (n.x - curx) ** 2 + (n.y - cury) ** 2
+            if d2 < best_d2:
+                best, best_d2 = n, d2
+        return best
+
+
+def _timed(fn, args_list):
+    samples = []
+    out = []
+    for a in args_list:
+        t0 = time.perf_counter()
+        out.append(fn(*a))
+        samples.append(time.perf_counter() - t0)
+    return out, samples
+
+
+def _d2(n, x, y):
+    return None if n is None else (n.x - x) ** 2 + (n.y - y) ** 2
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    now = clock.now()
+    print(f"{'nodes':>8} {'op':<15} {'linear p50 us':>14} {'index p50 us':>13} {'speedup':>8} {'same':>5}")
+    for count in args.nodes:
+        # node density about one per 4 merge cells; a quarter of them still cooling down
+        side = int(NODE_MERGE_RADIUS_PX * 2 * count ** 0.5)
+        xs = rng.integers(0, side, count)
+        ys = rng.integers(0, side, count)
+        ages = np.where(rng.random(count) < 0.25, 0.0, NODE_MIN_REVISIT_SEC * 2)
+        linear, indexed = _LinearDB(), WaypointDB()
+        for x, y, age in zip(xs.tolist(), ys.tolist(), ages.tolist()):
+            linear.nodes.append(Node(x=x, y=y, last_collected=now - age))
+            indexed.add_or_update(x, y, now - age)
+        linear.nodes = [Node(n.x, n.y, n.last_collected) for n in indexed.nodes]
+
+        points = [(int(x), int(y)) for x, y in rng.integers(0, side, (args.queries, 2))]
+        lin, lin_t = _timed(lambda x, y: linear.next_available(x, y, now), points)
+        idx, idx_t = _timed(lambda x, y: indexed.next_available(x, y, remove=False), points)
+        same = sum(_d2(a, x, y) == _d2(b, x, y) for a, b, (x, y) in zip(lin, idx, points))
+        _row(count, "next_available", lin_t, idx_t, same, len(points))
+
+        lin_u, lin_ut = _timed(lambda x, y: linear.add_or_update(x, y, now), points)
+        idx_u, idx_ut = _timed(lambda x, y: indexed.add_or_update(x, y, now), points)
+        same = int(len(linear.nodes) == len(indexed))
+        _row(count, "add_or_update", lin_ut, idx_ut, same, 1)
+
+
+def _row(count, op, lin_t, idx_t, same, total):
+    lp, ip = percentile(lin_t, 50) * 1e6, percentile(idx_t, 50) * 1e6
+    print(f"{count:>8} {op:<15} {lp:>14.1f} {ip:>13.1f} {lp / ip:>7.0f}x {same:>3}/{total}")
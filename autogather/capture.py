@@ -0,0 +1,103 @@
+import logging
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from autogather import clock
+from autogather.config import CAPTURE_FPS, CAPTURE_BUFFER_DEPTH, CAPTURE_WAIT_TIMEOUT, PROMPT_ROI
+from autogather.enums.aspect_ratio import AspectRatio
+
+logger = logging.getLogger(__name__)
+
+
+class FrameGrabber(threading.Thread):
+    # Grabs the window in the background into a ring of grayscale frames.
+    # Exposes the same grab_* methods as WindowScreen, so Worker can use either.
+    def __init__(self, screen, fps: float = CAPTURE_FPS, depth: int = CAPTURE_BUFFER_DEPTH):
+        super().__init__(daemon=True)
+        self.screen = screen
+        self.period = 1.0 / max(fps, 0.1)
+        self.depth = max(depth, 2)
+        self.grabbed = 0
+        self.failed = 0
+        self._slots: List[Optional[np.ndarray]] = [None] * self.depth
+        self._stamps: List[float] = [0.0] * self.depth
+        self._head = -1
+        self._cond = threading.Condition()
+        self._halt = threading.Event()
+
+    # ---- capture loop ----
+    def run(self):
+        while not self._halt.is_set():
+            started = clock.now()
+            try:
+                gray = self.screen.grab_gray()
+            except Exception as e:
+                logger.debug(f"Capture failed: {e}")
+                gray = None
+            if gray is None:
+                self.failed += 1
+            else:
+                self._store(started, gray)
+            self._halt.wait(max(0.0, self.period - (clock.now() - started)))
+
+    def _store(self, stamp: float, gray: np.ndarray):
+        i = (self._head + 1) % self.depth
+        slot = self._slots[i]
+        if slot is None or slot.shape != gray.shape:
+            slot = self._slots[i] = np.empty_like(gray)
+        with self._cond:
+            np.copyto(slot, gray)
+            self._stamps[i] = stamp
+            self._head = i
+            self.grabbed += 1
+            self._cond.notify_all()
+
+    def stop(self):
+        self._halt.set()
+
+    # ---- readers ----
+    def latest(self, newer_than: Optional[float] = None,
+               timeout: float = CAPTURE_WAIT_TIMEOUT) -> Optional[Tuple[float, np.ndarray]]:
+        # freshest frame whose grab started after newer_than; None if none arrives in time, since an
+        # older frame may predate the input the caller is waiting to see
+        deadline = clock.now() + timeout
+        with self._cond:
+            while self._head < 0 or (newer_than is not None and self._stamps[self._head] <= newer_than):
+                left = deadline - clock.now()
+                if left <= 0 or self._halt.is_set():
+                    return None
+                self._cond.wait(left)
+            return self._stamps[self._head], self._slots[self._head]
+
+    def grab_gray(self, newer_than: Optional[float] = None):
+        with self._cond:
+            hit = self.latest(newer_than)
+            if hit is not None:
+                return hit[1].copy()
+        # the ring fell behind: grab synchronously, which is always newer
+        gray = self.screen.grab_gray()
+        return None if gray is None else gray.copy()
+
+    def grab_gray_region(self, rect, newer_than: Optional[float] = None):
+        x1, y1, x2, y2 = rect
+        with self._cond:
+            hit = self.latest(newer_than)
+            if hit is not None:
+                return hit[1][y1:y2, x1:x2].copy()
+        roi = self.screen.grab_gray_region(rect)
+        return None if roi is None else roi.copy()
+
+    def grab_bgr(self):
+        return self.screen.grab_bgr()
+
+    def dims(self):
+        return self.screen.dims()
+
+    def roi_rect(self, ratio: AspectRatio, roi_promt=PROMPT_ROI):
+        return self.screen.roi_rect(ratio, roi_promt)
+
+    @property
+    def version(self) -> int:
+        return self.screen.version
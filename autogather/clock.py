@@ -0,0 +1,56 @@
+import threading
+import time
+
+
+class RealClock:
+    def now(self) -> float:
+        return time.time()
+
+    def sleep(self, sec: float):
+        time.sleep(sec)
+
+    def wait(self, event: threading.Event, sec: float) -> bool:
+        return event.wait(max(0.0, sec))
+
+
+class FastForwardClock:
+    # Wall time plus every sleep skipped so far: computation still costs real time,
+    # waiting costs nothing. Used by the replay harness.
+    def __init__(self):
+        self.skipped = 0.0
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        return time.time() + self.skipped
+
+    def sleep(self, sec: float):
+        if sec > 0:
+            with self._lock:
+                self.skipped += sec
+
+    def wait(self, event: threading.Event, sec: float) -> bool:
+        if event.is_set():
+            return True
+        self.sleep(sec)
+        return event.is_set()
+
+
+_clock = RealClock()
+
+
+def install(clock):
+    global _clock
+    _clock = clock
+
+
+def now() -> float:
+    return _clock.now()
+
+
+def sleep(sec: float):
+    _clock.sleep(sec)
+
+
+def wait(event: threading.Event, sec: float) -> bool:
+    # sleep() that ends early once event is set; True if it was
+    return _clock.wait(event, sec)
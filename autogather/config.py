@@ -3,10 +3,29 @@ RESOURCES_ROOT_DEFAULT = "resources"
 ACTION_COOLDOWN = 1
 
 PROMPT_ROI = (0.65, 0.49, 0.86, 0.62)  # (x1_frac, y1_frac, x2_frac, y2_frac)
+GEOMETRY_REFRESH_SEC = 1.0
+
+CAPTURE_THREAD_ENABLED = False
+CAPTURE_FPS = 20
+CAPTURE_BUFFER_DEPTH = 4
+CAPTURE_WAIT_TIMEOUT = 0.5
+
+EVENT_WAITS_ENABLED = True  # False restores the fixed sleeps
+WAIT_POLL_SEC = 0.1
+
+METRICS_DUMP_DIR = "metrics"  # stage timings are written here when the worker stops; None disables
 
 MATCH_THRESHOLD = 0.7
+PROMPT_DIFF_TOLERANCE = 8.0  # None disables reusing prompt results on an unchanged ROI
+PROMPT_DIFF_SIZE = (64, 24)
+PROMPT_DIFF_MAX_AGE_SEC = 5.0
 SCALES = [0.70, 0.80, 0.90, 1.00, 1.12, 1.25, 1.40]
 ALIGN_TOLERANCE = 16
+TEMPLATE_MIN_SIZE = 12
+TEMPLATE_RELOAD_CHECK_SEC = 2.0
+ADAPTIVE_SCALES = True
+ADAPTIVE_MISS_STREAK = 5
+MATCH_WORKERS = 0  # 0 = one per core
 
 SCROLL_UNIT = -120
 SCROLL_DELAY = 0.25
@@ -18,14 +37,69 @@ GAME_TITLE_KEYWORDS = ("blue", "protocol", "star", "resonance", "BPSR", "Blue",
 REQUIRED_FOLDERS = ("focused", "gathering", "selector", "resource")
 
 RESOURCE_THRESHOLD = 0.8
+RESOURCE_COARSE_TO_FINE = True
+COARSE_FACTOR = 0.5
+COARSE_THRESHOLD_DROP = 0.15
+COARSE_CANDIDATES = 3
+COARSE_REFINE_MARGIN = 6
+# MatchStrategy.FEATURES: ORB keypoints place the template at any scale, matchTemplate confirms it
+FEATURE_TEMPLATE_KEYPOINTS = 200
+FEATURE_FRAME_KEYPOINTS = 3000
+FEATURE_PATCH_SIZE = 15  # small, most resource templates are ~30 px
+FEATURE_LEVELS = 4  # ORB pyramid, 1.2x apart: covers the 2x range of SCALES
+FEATURE_FAST_THRESHOLD = 20  # frame corners; templates use 5 to get enough keypoints
+FEATURE_MIN_MATCHES = 6  # RANSAC inliers; templates with fewer keypoints fall back to the scale scan
+FEATURE_RATIO = 0.8  # Lowe ratio test
+FEATURE_SCALE_STEP = 0.02  # verification scales are rounded to this, to reuse scaled templates
+# resource templates that another one in the folder already finds are dropped at load
+TEMPLATE_COMPACTION_ENABLED = True
+COMPACTION_SIMILARITY = 0.9  # TM_CCOEFF_NORMED of the kept template inside the dropped one
+COMPACTION_RATIOS = (0.90, 1.00, 1.12)  # relative sizes tried, about one SCALES step either way
+COMPACTION_PAD = 0.2  # a kept template may be this much larger than the one it covers
 APPROACH_PAUSE = 0.08
+MULTI_TARGET_ENABLED = True  # record every resource found by a scan as a waypoint, not just the one approached
+FIND_ALL_MAX_PEAKS = 8  # per template and scale
+FIND_ALL_OVERLAP = 0.5  # boxes overlapping more than this (of the smaller one) are the same object
+TRACKING_ENABLED = True  # look for the last resource around where it should be before scanning the frame
+TRACK_MARGIN_PX = 60
+TRACK_MOVE_SLACK = 0.25  # extra window margin per px walked since the resource was last seen
+TRACK_SCALE_STEPS = 1  # neighbouring SCALES tried around the locked one
+ODOMETRY_ENABLED = True  # correct the navigator position from the frames before and after each move
+ODOMETRY_SCALE = 0.25  # downsampling for phase correlation
+ODOMETRY_MIN_RESPONSE = 0.1  # phase correlation peak below this is not trusted
+ODOMETRY_MAX_SHIFT = 0.4  # longest measurable move, as a share of the frame side
+ODOMETRY_GAIN = 1.0  # share of the measured error applied to the position
+DIAGONAL_MOVES_ENABLED = True  # False moves along Y, then X
+# how much longer an axis takes per px with both keys held than alone (1.41 when the game normalises speed)
+DIAGONAL_MULT = 1.41
+CALIBRATION_MOVES_MS = (150, 300, 500, 800)  # test holds, each key there and back
+CALIBRATION_SETTLE_SEC = 0.3
+CALIBRATION_MIN_SAMPLES = 3  # per axis, after outliers are dropped
+CALIBRATION_OUTLIER_MAD = 3.0  # samples further off the fit than this many (scaled) MADs are dropped
+CALIBRATION_TRACK_PX = 80  # a hit further than this from where the fit puts the resource is another node
 
 NODE_MIN_REVISIT_SEC = 30
 NODE_MERGE_RADIUS_PX = 50
+RESPAWN_LEARNING_ENABLED = True  # False keeps NODE_MIN_REVISIT_SEC for every node
+RESPAWN_MIN_SEC = 10  # gathers closer than this are one harvest of a multi-gather node
+RESPAWN_MAX_SEC = 900
+RESPAWN_RESOLUTION_SEC = 3  # stop probing once the interval is known this closely
+RESPAWN_MAX_MISSES = 3  # drop a node found empty this many times after it should have respawned
+ROUTE_PLANNER_ENABLED = True  # False keeps the greedy nearest-ready choice
+ROUTE_HORIZON_SEC = 60  # plan over nodes ready within this time
+ROUTE_MAX_NODES = 25
+ROUTE_LOOKAHEAD = 3  # stops searched exhaustively
+ROUTE_BRANCH = 8  # among this many most promising nodes
+ROUTE_ROLLOUTS = 8  # best starts played out nearest-ready and compared
+ROUTE_ROLLOUT_GATHERS = 16  # gathers each play-out runs for
+WAYPOINT_MAPS_DIR = "maps"  # waypoint maps per resource and route; None disables
+DEFAULT_ROUTE = "default"
 
 PRESET_ASPECT_RATIO = "aspect_ratio"
 PRESET_MULT_X = "mult_x"
 PRESET_MULT_Y = "mult_y"
+PRESET_DIAG_MULT_X = "diag_mult_x"
+PRESET_DIAG_MULT_Y = "diag_mult_y"
 PRESET_TOL_X = "tol_x"
 PRESET_TOL_Y = "tol_y"
 PRESET_WANT_GATHERING = "want_gathering"
@@ -34,3 +108,6 @@ PRESET_MOVE_BACK_TO_START = "move_back_to_start"
 PRESET_SPEED = "gathering_speed"
 PRESET_ADJUST_DIRECTION = "adjust_dir"
 PRESET_ADJUST_EVERY_CYCLE = "adjust_cycle"
+PRESET_ROUTE = "route"
+PRESET_MATCH_STRATEGY = "match_strategy"
+PRESET_MOVE_CALIBRATION = "move_calibration"  # top level, per aspect ratio
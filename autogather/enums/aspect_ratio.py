@@ -38,6 +38,6 @@ class AspectRatio(Enum):
         try:
             with open(preset_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
-                return data.get(PRESET_ASPECT_RATIO)
+                return data.get(PRESET_ASPECT_RATIO) or AspectRatio.RATIO_16_9
         except Exception:
             return AspectRatio.RATIO_16_9
@@ -0,0 +1,17 @@
+from enum import Enum
+
+
+class MatchStrategy(Enum):
+    FULL = "Full"
+    PYRAMID = "Pyramid"
+    FEATURES = "Features"
+
+    def __str__(self):
+        return self.value
+
+    @staticmethod
+    def get_strategy(value: str):
+        for strategy in MatchStrategy:
+            if strategy.value == value:
+                return strategy
+        raise ValueError(f"Unknown match strategy: {value}")
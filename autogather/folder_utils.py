@@ -1,10 +1,15 @@
+import logging
 import os
 from typing import List, Dict
 
-from autogather.config import RESOURCES_ROOT_DEFAULT, REQUIRED_FOLDERS
+from autogather.config import RESOURCES_ROOT_DEFAULT, REQUIRED_FOLDERS, ADAPTIVE_SCALES, RESOURCE_COARSE_TO_FINE, \
+    TEMPLATE_COMPACTION_ENABLED, SCALES
+from autogather.enums.match_strategy import MatchStrategy
 from autogather.enums.resource import Resource
 from autogather.model.templates import TemplateSet
 
+logger = logging.getLogger(__name__)
+
 FOLDER_TO_RESOURCE: Dict[str, Resource] = {r.folder_name: r for r in Resource}
 
 
@@ -36,7 +41,7 @@ def resource_has_required_folders(resource_dir: str, res: Resource) -> bool:
     return True
 
 
-def load_resource_dir(resource_dir: str, res: Resource):
+def load_resource_dir(resource_dir: str, res: Resource, strategy: MatchStrategy = None):
     resource_dir = RESOURCES_ROOT_DEFAULT + "/" + resource_dir
     if not os.path.isdir(resource_dir):
         raise FileNotFoundError(f"Resource folder not found: {resource_dir}")
@@ -51,7 +56,17 @@ def load_resource_dir(resource_dir: str, res: Resource):
     if not dir_r: missing.append(REQUIRED_FOLDERS[3] + "/")
     if missing:
         raise FileNotFoundError(f"In {resource_dir} no subfolders: {', '.join(missing)}")
-    return TemplateSet(dir_f), TemplateSet(dir_g), TemplateSet(dir_s), TemplateSet(dir_r)
+    ts_r = TemplateSet(dir_r, strategy=strategy or _resource_strategy(), compacted=TEMPLATE_COMPACTION_ENABLED)
+    if ts_r.compaction and ts_r.compaction.dropped:
+        c = ts_r.compaction
+        logger.info(f"{res.folder_name}: {len(c.clusters)} of {len(c.matrix)} resource templates kept, "
+                    f"{c.saved(SCALES)} template x scale matches saved per full scan")
+    return (TemplateSet(dir_f, ADAPTIVE_SCALES), TemplateSet(dir_g, ADAPTIVE_SCALES),
+            TemplateSet(dir_s, ADAPTIVE_SCALES), ts_r)
+
+
+def _resource_strategy() -> MatchStrategy:
+    return MatchStrategy.PYRAMID if RESOURCE_COARSE_TO_FINE else MatchStrategy.FULL
 
 
 def _pick_subdir(resource_dir: str, *alts):
@@ -3,18 +3,30 @@ try:
 except Exception:
     pdi = None
 
-import time
-
-import pyautogui as pag
+try:
+    import pyautogui as pag
 
-pag.PAUSE = 0
-pag.FAILSAFE = True
+    pag.PAUSE = 0
+    pag.FAILSAFE = True
+except Exception:
+    pag = None
 
+from . import clock
 from .config import SCROLL_UNIT, SCROLL_DELAY
 
+# When set, every input goes to this object instead of the OS (see autogather.replay.RecordingInput)
+_sink = None
+
+
+def set_sink(sink):
+    global _sink
+    _sink = sink
+
 
 def press_key(key: str):
-    if pdi:
+    if _sink:
+        _sink.press(key)
+    elif pdi:
         pdi.press(key)
     else:
         pag.press(key)
@@ -28,14 +40,18 @@ def press_keys(*keys: str):
 
 
 def key_down(key: str):
-    if pdi:
+    if _sink:
+        _sink.key_down(key)
+    elif pdi:
         pdi.keyDown(key)
     else:
         pag.keyDown(key)
 
 
 def key_up(key: str):
-    if pdi:
+    if _sink:
+        _sink.key_up(key)
+    elif pdi:
         pdi.keyUp(key)
     else:
         pag.keyUp(key)
@@ -46,34 +62,64 @@ def hold_key_ms(key: str, ms: int):
         return
     key_down(key)
     try:
-        time.sleep(max(0, ms) / 1000.0)
+        clock.sleep(max(0, ms) / 1000.0)
     finally:
         key_up(key)
 
 
+def hold_keys_ms(durations: dict):
+    # presses every key at once and lets each go after its own ms, shortest first
+    keys = sorted((ms, k) for k, ms in durations.items() if ms > 0)
+    if not keys:
+        return
+    for _, k in keys:
+        key_down(k)
+    held = released = 0
+    try:
+        for ms, k in keys:
+            clock.sleep((ms - held) / 1000.0)
+            held = ms
+            key_up(k)
+            released += 1
+    finally:
+        for _, k in keys[released:]:
+            key_up(k)
+
+
 def move_mouse_abs(x: int = None, y: int = None):
-    if pdi:
+    if _sink:
+        _sink.move(int(x), int(y), False)
+    elif pdi:
         pdi.moveTo(int(x), int(y))
     else:
         pag.moveTo(int(x), int(y))
 
 
 def move_mouse_rel(dx: int = None, dy: int = None):
-    if pdi:
+    if _sink:
+        _sink.move(int(dx), int(dy), True)
+    elif pdi:
         pdi.moveRel(int(dx), int(dy))
     else:
         pag.moveRel(int(dx), int(dy))
 
 
+def _scroll(unit: int):
+    if _sink:
+        _sink.scroll(unit)
+    else:
+        pag.scroll(unit)
+
+
 def scroll_once(unit: int = SCROLL_UNIT):
-    pag.scroll(unit)
-    time.sleep(SCROLL_DELAY)
+    _scroll(unit)
+    clock.sleep(SCROLL_DELAY)
 
 
 def scroll_slow(steps: int = 1, unit: int = SCROLL_UNIT, delay: float = SCROLL_DELAY):
     for _ in range(max(0, steps)):
-        pag.scroll(unit)
-        time.sleep(delay)
+        _scroll(unit)
+        clock.sleep(delay)
 
 
 def _hide_unhide_ui():
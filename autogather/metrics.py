@@ -0,0 +1,137 @@
+import csv
+import json
+import os
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List
+
+from autogather import clock
+
+# bucket upper bounds: 10 µs doubling every four buckets, up to ~45 minutes
+_BOUNDS = [1e-5 * 2 ** (i / 4) for i in range(112)]
+
+# stage name prefix -> where the time goes; other spans ("cycle", "align.step") contain these
+GROUPS = {"capture": "cpu", "grayscale": "cpu", "match": "cpu", "input": "input", "sleep": "sleep"}
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, sec: float):
+        self.counts[bisect_left(_BOUNDS, sec)] += 1
+        self.count += 1
+        self.total += sec
+        self.min = min(self.min, sec)
+        self.max = max(self.max, sec)
+
+    def percentile(self, q: float) -> float:
+        # upper bound of the bucket holding the q-th sample, never above the largest one seen
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(_BOUNDS[i] if i < len(_BOUNDS) else self.max, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "total_sec": round(self.total, 4),
+            "mean_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50) * 1000, 3),
+            "p95_ms": round(self.percentile(95) * 1000, 3),
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+class Registry:
+    def __init__(self):
+        self._hists: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+        self.started_at = clock.now()
+
+    def observe(self, name: str, sec: float):
+        with self._lock:
+            h = self._hists.get(name)
+            if h is None:
+                h = self._hists[name] = Histogram()
+            h.add(sec)
+
+    @contextmanager
+    def span(self, name: str):
+        # timed with autogather.clock, so skipped sleeps still count under the replay clock
+        t0 = clock.now()
+        try:
+            yield
+        finally:
+            self.observe(name, clock.now() - t0)
+
+    def reset(self):
+        with self._lock:
+            self._hists = {}
+            self.started_at = clock.now()
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: h.summary() for name, h in sorted(self._hists.items())}
+
+    def breakdown(self) -> Dict[str, float]:
+        # share of the stage time spent computing, sending input and sleeping
+        totals = {"cpu": 0.0, "input": 0.0, "sleep": 0.0}
+        for name, s in self.snapshot().items():
+            group = GROUPS.get(name.split(".", 1)[0])
+            if group:
+                totals[group] += s["total_sec"]
+        spent = sum(totals.values())
+        return {k: round(v / spent, 3) if spent else 0.0 for k, v in totals.items()}
+
+    def report(self) -> dict:
+        return {
+            "elapsed_sec": round(clock.now() - self.started_at, 3),
+            "breakdown": self.breakdown(),
+            "stages": self.snapshot(),
+        }
+
+    def lines(self, limit: int = 8) -> List[str]:
+        stages = sorted(self.snapshot().items(), key=lambda kv: kv[1]["total_sec"], reverse=True)
+        shares = " ".join(f"{k} {v:.0%}" for k, v in self.breakdown().items())
+        out = [shares] if stages else []
+        for name, s in stages[:limit]:
+            out.append(f"{name:<16} n={s['count']:<5} p50 {s['p50_ms']:>7.1f} ms  p95 {s['p95_ms']:>7.1f} ms")
+        return out
+
+    def dump(self, path_base: str):
+        # writes <path_base>.json and <path_base>.csv
+        os.makedirs(os.path.dirname(path_base) or ".", exist_ok=True)
+        with open(path_base + ".json", "w", encoding="utf-8") as f:
+            json.dump(self.report(), f, indent=2)
+        stages = self.snapshot()
+        with open(path_base + ".csv", "w", encoding="utf-8", newline="") as f:
+            w = csv.writer(f)
+            w.writerow(["stage", "count", "total_sec", "mean_ms", "p50_ms", "p95_ms", "max_ms"])
+            for name, s in stages.items():
+                w.writerow([name, s["count"], s["total_sec"], s["mean_ms"], s["p50_ms"], s["p95_ms"], s["max_ms"]])
+
+
+_registry = Registry()
+
+
+def registry() -> Registry:
+    return _registry
+
+
+def span(name: str):
+    return _registry.span(name)
+
+
+def observe(name: str, sec: float):
+    _registry.observe(name, sec)
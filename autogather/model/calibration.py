@@ -0,0 +1,199 @@
+# autogather/calibration.py
+import json
+import logging
+import os
+import threading
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from autogather import clock
+from autogather.config import (
+    SCALES, RESOURCE_THRESHOLD, PRESET_MOVE_CALIBRATION, PRESET_ASPECT_RATIO,
+    CALIBRATION_MOVES_MS, CALIBRATION_SETTLE_SEC, CALIBRATION_MIN_SAMPLES, CALIBRATION_OUTLIER_MAD,
+    CALIBRATION_TRACK_PX
+)
+from autogather.enums.aspect_ratio import AspectRatio
+from autogather.enums.resource import Resource
+from autogather.folder_utils import _presets_path
+from autogather.model.match_executor import shared_executor
+from autogather.model.navigator import run
+from autogather.model.templates import TemplateSet
+
+logger = logging.getLogger(__name__)
+
+
+class AxisFit(NamedTuple):
+    # key-hold ms to cover px along one axis: a * px + b (b is the spin-up time)
+    a: float
+    b: float
+    samples: int = 0
+    rmse_ms: float = 0.0
+
+    def ms(self, px: float) -> float:
+        if px == 0:
+            return 0.0
+        return float(np.sign(px)) * max(0.0, self.a * abs(px) + self.b)
+
+    def px(self, ms: float) -> float:
+        # inverse of ms(): how far a hold of ms is expected to move
+        return max(0.0, (ms - self.b) / self.a)
+
+    @staticmethod
+    def fit(samples: List[Tuple[float, float]]) -> Optional["AxisFit"]:
+        # samples are (px moved, ms held). Samples off the first fit by more than CALIBRATION_OUTLIER_MAD
+        # scaled MADs (a misread position) are dropped once and the rest refitted.
+        line = _line(samples)
+        if line is None:
+            return None
+        a, b, px, ms = line
+        res = a * px + b - ms
+        dev = np.abs(res - np.median(res))
+        # 1.4826 * MAD estimates the standard deviation; the 1 ms floor keeps an exact fit from dropping everything
+        keep = dev <= max(CALIBRATION_OUTLIER_MAD * 1.4826 * float(np.median(dev)), 1.0)
+        if not keep.all():
+            logger.info(f"Calibration dropped {int((~keep).sum())}/{len(samples)} outlying moves")
+            samples = [s for s, k in zip(samples, keep) if k]
+            line = _line(samples)
+            if line is None:
+                return None
+            a, b, px, ms = line
+        if a <= 0:
+            return None
+        rmse = float(np.sqrt(np.mean((a * px + b - ms) ** 2)))
+        return AxisFit(float(a), float(b), len(samples), rmse)
+
+
+def _line(samples: List[Tuple[float, float]]):
+    if len(samples) < CALIBRATION_MIN_SAMPLES or len({px for px, _ in samples}) < 2:
+        return None
+    px = np.array([s[0] for s in samples], dtype=np.float64)
+    ms = np.array([s[1] for s in samples], dtype=np.float64)
+    a, b = np.polyfit(px, ms, 1)
+    return a, b, px, ms
+
+
+class MoveCalibration(NamedTuple):
+    x: AxisFit
+    y: AxisFit
+
+    def to_json(self) -> dict:
+        return {"x": list(self.x), "y": list(self.y)}
+
+    @staticmethod
+    def from_json(d: dict) -> "MoveCalibration":
+        return MoveCalibration(AxisFit(*d["x"]), AxisFit(*d["y"]))
+
+    @staticmethod
+    def load(ratio: AspectRatio) -> Optional["MoveCalibration"]:
+        path = _presets_path()
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                d = (json.load(f) or {}).get(PRESET_MOVE_CALIBRATION, {}).get(str(ratio))
+            return MoveCalibration.from_json(d) if d else None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring movement calibration for {ratio}: {e}")
+            return None
+
+    def save(self, ratio: AspectRatio):
+        path = _presets_path()
+        data = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f) or {}
+        else:
+            # a fresh presets file is seeded like the UI's Save preset, so Start can read it back
+            for res in Resource:
+                data[res.folder_name] = res.to_json()
+            data[PRESET_ASPECT_RATIO] = str(ratio)
+        data.setdefault(PRESET_MOVE_CALIBRATION, {})[str(ratio)] = self.to_json()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+
+class Calibrator(threading.Thread):
+    # Holds each movement key for the CALIBRATION_MOVES_MS durations, there and back, and measures how far
+    # the resource moved on screen with the resource templates. The (px, ms) pairs are fitted per axis.
+    # The character needs a resource in view that stays in view for the longest move.
+    def __init__(self, screen, ts_res: TemplateSet, ratio: AspectRatio):
+        super().__init__(daemon=True)
+        self.screen = screen
+        self.ts_resource = ts_res
+        self.ratio = ratio
+        self.matcher = shared_executor()
+        self.state = "idle"
+        self.result: Optional[MoveCalibration] = None
+        self.error: Optional[str] = None
+        self._stop = threading.Event()
+        self._input_at = 0.0
+
+    def stop(self):
+        self._stop.set()
+
+    def _locate(self, near: Optional[Tuple[float, float]] = None,
+                max_px: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        # the hit closest to near (where the tracked resource should be now), so another node in view
+        # can't take its place; the strongest hit when there is nothing to track yet
+        gray = self.screen.grab_gray(self._input_at)
+        if gray is None:
+            return None
+        hits = self.matcher.find_all(gray, self.ts_resource, SCALES, RESOURCE_THRESHOLD)
+        centers = [((x1 + x2) // 2, (y1 + y2) // 2) for (x1, y1), (x2, y2) in (h["box"] for h in hits)]
+        if not centers:
+            return None
+        if near is None:
+            return centers[0]
+        c = min(centers, key=lambda p: (p[0] - near[0]) ** 2 + (p[1] - near[1]) ** 2)
+        if max_px is not None and np.hypot(c[0] - near[0], c[1] - near[1]) > max_px:
+            return None
+        return c
+
+    def _samples(self, is_x: bool) -> List[Tuple[float, float]]:
+        axis = 0 if is_x else 1
+        samples = []
+        before = self._locate()
+        for ms in CALIBRATION_MOVES_MS:
+            for sign in (1, -1):
+                if self._stop.is_set():
+                    return samples
+                self.state = f"calibrating {'X' if is_x else 'Y'}: {sign * ms} ms"
+                run(is_x, sign * ms)
+                clock.sleep(CALIBRATION_SETTLE_SEC)
+                self._input_at = clock.now()
+                if before is None:
+                    after = self._locate()
+                else:
+                    # walking towards +axis moves the resource towards -axis on screen
+                    near, max_px = list(before), None
+                    fit = AxisFit.fit(samples)
+                    if fit is not None:
+                        near[axis] -= sign * fit.px(ms)
+                        max_px = CALIBRATION_TRACK_PX
+                    after = self._locate(near, max_px)
+                if before is None or after is None:
+                    logger.info(f"Calibration move {sign * ms} ms lost the resource")
+                else:
+                    px = sign * (before[axis] - after[axis])
+                    if px > 0:
+                        samples.append((px, ms))
+                before = after
+        return samples
+
+    def run(self):
+        try:
+            fit_x = AxisFit.fit(self._samples(True))
+            fit_y = AxisFit.fit(self._samples(False))
+            if self._stop.is_set():
+                self.error = "stopped"
+            elif fit_x is None or fit_y is None:
+                self.error = "not enough consistent moves kept the resource in view"
+            else:
+                self.result = MoveCalibration(fit_x, fit_y)
+                self.result.save(self.ratio)
+                logger.info(f"Movement calibration for {self.ratio}: {self.result}")
+        except Exception as e:
+            logger.exception("Movement calibration failed")
+            self.error = str(e)
+        self.state = "calibration done" if self.result else f"calibration failed: {self.error}"
@@ -0,0 +1,75 @@
+# autogather/compaction.py
+import logging
+from typing import List, NamedTuple
+
+import cv2
+import numpy as np
+
+from autogather.config import COMPACTION_SIMILARITY, COMPACTION_RATIOS, COMPACTION_PAD, TEMPLATE_MIN_SIZE
+
+logger = logging.getLogger(__name__)
+
+
+def similarity(t: np.ndarray, img: np.ndarray) -> float:
+    # best TM_CCOEFF_NORMED of template t inside img, at sizes around 1:1. img is padded with its edge
+    # pixels, so t may be up to COMPACTION_PAD larger; 0.0 when t doesn't fit at any size.
+    ih, iw = img.shape[:2]
+    best = 0.0
+    for r in COMPACTION_RATIOS:
+        tw, th = int(t.shape[1] * r), int(t.shape[0] * r)
+        if tw < TEMPLATE_MIN_SIZE or th < TEMPLATE_MIN_SIZE:
+            continue
+        if tw > iw * (1 + COMPACTION_PAD) or th > ih * (1 + COMPACTION_PAD):
+            continue
+        px, py = max(0, tw - iw) + 1, max(0, th - ih) + 1
+        padded = cv2.copyMakeBorder(img, py, py, px, px, cv2.BORDER_REPLICATE)
+        scaled = cv2.resize(t, (tw, th), interpolation=cv2.INTER_AREA)
+        _, mx, _, _ = cv2.minMaxLoc(cv2.matchTemplate(padded, scaled, cv2.TM_CCOEFF_NORMED))
+        best = max(best, float(mx))
+    return best
+
+
+def similarity_matrix(tmps: List[np.ndarray]) -> np.ndarray:
+    # m[i, j]: how well template i finds template j
+    n = len(tmps)
+    m = np.eye(n, dtype=np.float32)
+    for i in range(n):
+        for j in range(n):
+            if i != j:
+                m[i, j] = similarity(tmps[i], tmps[j])
+    return m
+
+
+class Compaction(NamedTuple):
+    # one cluster per kept template, representative first, then the templates it covers
+    clusters: List[List[int]]
+    matrix: np.ndarray
+
+    @property
+    def keep(self) -> List[int]:
+        return [c[0] for c in self.clusters]
+
+    @property
+    def dropped(self) -> int:
+        return len(self.matrix) - len(self.clusters)
+
+    def saved(self, scales) -> int:
+        # (template, scale) pairs a full scan no longer tries
+        return self.dropped * len(scales)
+
+
+def compact(tmps: List[np.ndarray], threshold: float = COMPACTION_SIMILARITY) -> Compaction:
+    # greedy set cover: keep the template that finds the most not yet covered ones (ties go to the
+    # stronger matches), until every template is covered. Templates too small to match stay on their own.
+    m = similarity_matrix(tmps)
+    covers = m >= threshold
+    left = set(range(len(tmps)))
+    clusters = []
+    while left:
+        rep = max(sorted(left), key=lambda i: (sum(covers[i, j] for j in left), sum(m[i, j] for j in left)))
+        members = [j for j in sorted(left) if j != rep and covers[rep, j]]
+        clusters.append([rep] + members)
+        left -= {rep, *members}
+    clusters.sort(key=lambda c: c[0])
+    logger.debug(f"Compaction: {len(tmps)} -> {len(clusters)} templates")
+    return Compaction(clusters, m)
@@ -0,0 +1,68 @@
+# autogather/features.py
+import logging
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from autogather.config import FEATURE_TEMPLATE_KEYPOINTS, FEATURE_FRAME_KEYPOINTS, FEATURE_PATCH_SIZE, \
+    FEATURE_MIN_MATCHES, FEATURE_RATIO, FEATURE_LEVELS, FEATURE_FAST_THRESHOLD
+
+logger = logging.getLogger(__name__)
+
+Box = Tuple[Tuple[int, int], Tuple[int, int]]
+
+
+class FeatureIndex:
+    # ORB keypoints and descriptors of every template, computed once. A frame is described once too,
+    # and each template's matches are fitted with a similarity transform (scale, rotation, shift) by RANSAC,
+    # so the object is found at any scale, not just the listed SCALES. The box still has to be
+    # verified with matchTemplate by the caller. Templates with too few keypoints are left out (see usable).
+    def __init__(self, tmps: List[np.ndarray]):
+        self._tmp_orb = cv2.ORB_create(FEATURE_TEMPLATE_KEYPOINTS, nlevels=FEATURE_LEVELS,
+                                       edgeThreshold=FEATURE_PATCH_SIZE, patchSize=FEATURE_PATCH_SIZE, fastThreshold=5)
+        self._frame_orb = cv2.ORB_create(FEATURE_FRAME_KEYPOINTS, nlevels=FEATURE_LEVELS,
+                                         edgeThreshold=FEATURE_PATCH_SIZE, patchSize=FEATURE_PATCH_SIZE,
+                                         fastThreshold=FEATURE_FAST_THRESHOLD)
+        self._bf = cv2.BFMatcher(cv2.NORM_HAMMING)
+        self.sizes = [g.shape[:2] for g in tmps]
+        self._desc = []
+        for g in tmps:
+            kp, des = self._tmp_orb.detectAndCompute(g, None)
+            if des is None or len(kp) < FEATURE_MIN_MATCHES:
+                self._desc.append(None)
+            else:
+                self._desc.append((np.float32([k.pt for k in kp]), des))
+        self.usable = [i for i, d in enumerate(self._desc) if d is not None]
+        logger.debug(f"Feature index: {len(self.usable)}/{len(tmps)} templates with keypoints")
+
+    def candidates(self, gray) -> List[Tuple[int, float, Box]]:
+        # (template, scale, box) for every template whose keypoints agree on a placement in the frame
+        if not self.usable:
+            return []
+        kp, des = self._frame_orb.detectAndCompute(gray, None)
+        if des is None or len(kp) < FEATURE_MIN_MATCHES:
+            return []
+        frame_pts = np.float32([k.pt for k in kp])
+        H, W = gray.shape[:2]
+        found = []
+        for idx in self.usable:
+            pts, tdes = self._desc[idx]
+            good = [m[0] for m in self._bf.knnMatch(tdes, des, k=2)
+                    if len(m) == 2 and m[0].distance < FEATURE_RATIO * m[1].distance]
+            if len(good) < FEATURE_MIN_MATCHES:
+                continue
+            src = pts[[m.queryIdx for m in good]]
+            dst = frame_pts[[m.trainIdx for m in good]]
+            M, inliers = cv2.estimateAffinePartial2D(src, dst, method=cv2.RANSAC, ransacReprojThreshold=3.0)
+            if M is None or int(inliers.sum()) < FEATURE_MIN_MATCHES:
+                continue
+            scale = float(np.hypot(M[0, 0], M[1, 0]))
+            th, tw = self.sizes[idx]
+            corners = np.float32([[0, 0], [tw, 0], [0, th], [tw, th]]) @ M[:, :2].T + M[:, 2]
+            x1, y1 = np.floor(corners.min(axis=0)).astype(int)
+            x2, y2 = np.ceil(corners.max(axis=0)).astype(int)
+            if x2 <= 0 or y2 <= 0 or x1 >= W or y1 >= H:
+                continue
+            found.append((idx, scale, ((int(x1), int(y1)), (int(x2), int(y2)))))
+        return found
@@ -0,0 +1,106 @@
+# autogather/match_executor.py
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence
+
+from autogather import clock, metrics
+from autogather.config import MATCH_WORKERS
+from autogather.enums.match_strategy import MatchStrategy
+from autogather.model.templates import TemplateSet, suppress
+
+
+class MatchExecutor:
+    def __init__(self, workers: int = 0):
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="match") \
+            if self.workers > 1 else None
+
+    def best_match(self, gray, template_set: TemplateSet, scales, threshold) -> Optional[dict]:
+        return self.best_matches(gray, [template_set], scales, threshold)[0]
+
+    def best_matches(self, gray, sets: Sequence[Optional[TemplateSet]], scales, threshold) -> List[Optional[dict]]:
+        if self._pool is None:
+            return [self._timed_match(gray, ts, scales, threshold) for ts in sets]
+
+        # feature sets are one detection per frame rather than (template, scale) jobs
+        direct = [ts is not None and ts.strategy == MatchStrategy.FEATURES for ts in sets]
+        direct_hits = [self._timed_match(gray, ts, scales, threshold) if d else None for ts, d in zip(sets, direct)]
+
+        # every (set, template, scale) job goes to the pool at once; a set stops early on a >= 0.9 hit
+        plans = [ts.plan(scales) if ts is not None and not d else ([], True) for ts, d in zip(sets, direct)]
+        frames = [ts.prepare(gray) if ts is not None and pairs else None for ts, (pairs, _) in zip(sets, plans)]
+        done = [threading.Event() for _ in sets]
+
+        def job(i, idx, sc):
+            # stamped here, since results are collected in submission order, not as they complete
+            if done[i].is_set():
+                return False, None, clock.now()
+            tried, cand = sets[i].match_pair(frames[i], idx, sc, threshold)
+            if cand and cand["score"] >= 0.9:
+                done[i].set()
+            return tried, cand, clock.now()
+
+        started = clock.now()
+        futures = [(i, self._pool.submit(job, i, idx, sc))
+                   for i, (pairs, _) in enumerate(plans) for idx, sc in pairs]
+        best: List[Optional[dict]] = [None] * len(sets)
+        finished = [started] * len(sets)
+        for i, fut in futures:
+            tried, cand, ended = fut.result()
+            finished[i] = max(finished[i], ended)
+            if tried:
+                sets[i].stats["pairs_tried"] += 1
+            if cand and (not best[i] or cand["score"] > best[i]["score"]):
+                best[i] = cand
+        # a set's latency is until its last job finished; sets run concurrently, so these overlap
+        for i, ts in enumerate(sets):
+            if ts is not None and not direct[i]:
+                metrics.observe(f"match.{ts.name}", finished[i] - started)
+
+        for i, ts in enumerate(sets):
+            if ts is not None and plans[i][0]:
+                ts.finish(best[i], plans[i][1])
+        return [direct_hits[i] if direct[i] else best[i] for i in range(len(sets))]
+
+    def find_all(self, gray, ts: TemplateSet, scales, threshold) -> List[dict]:
+        with metrics.span(f"match.{ts.name}"):
+            if self._pool is None or ts.strategy == MatchStrategy.FEATURES:
+                return ts.find_all(gray, scales, threshold)
+            pairs, full_scan = ts.plan(scales)
+            if not pairs:
+                return []
+            frame = ts.prepare(gray)
+            futures = [self._pool.submit(ts.match_pair_all, frame, idx, sc, threshold) for idx, sc in pairs]
+            cands = []
+            for fut in futures:
+                tried, found = fut.result()
+                if tried:
+                    ts.stats["pairs_tried"] += 1
+                cands.extend(found)
+            hits = suppress(cands)
+            ts.finish(hits[0] if hits else None, full_scan)
+            return hits
+
+    @staticmethod
+    def _timed_match(gray, ts: Optional[TemplateSet], scales, threshold) -> Optional[dict]:
+        if ts is None:
+            return None
+        with metrics.span(f"match.{ts.name}"):
+            return ts.best_match(gray, scales, threshold)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_shared: Optional[MatchExecutor] = None
+_shared_lock = threading.Lock()
+
+
+def shared_executor() -> MatchExecutor:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = MatchExecutor(MATCH_WORKERS)
+        return _shared
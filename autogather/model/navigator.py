@@ -1,29 +1,55 @@
 # autogather/navigator.py
 import logging
-import time
+from typing import Tuple
 
+from autogather import clock, metrics
 from autogather.config import (
-    APPROACH_PAUSE
+    APPROACH_PAUSE, DIAGONAL_MOVES_ENABLED
 )
-from autogather.input_sim import hold_key_ms
+from autogather.input_sim import hold_key_ms, hold_keys_ms
 from autogather.model.resource_model import ResourceObject
 
 logger = logging.getLogger(__name__)
 
 
+def _button(is_x: bool, axis_value: float) -> str:
+    if is_x:
+        return 'a' if axis_value < 0 else 'd'
+    return 'w' if axis_value < 0 else 's'
+
+
 def run(is_x: bool, axis_value: int):
     ms_run = abs(axis_value)
-    if is_x:
-        button = 'a' if axis_value < 0 else 'd'
-    else:
-        button = 'w' if axis_value < 0 else 's'
-    hold_key_ms(button, ms_run)
-    time.sleep(APPROACH_PAUSE)
+    with metrics.span("input.hold"):
+        hold_key_ms(_button(is_x, axis_value), ms_run)
+    with metrics.span("sleep.approach"):
+        clock.sleep(APPROACH_PAUSE)
+
+
+def diagonal_ms(dx_ms: float, dy_ms: float, diag_x: float, diag_y: float) -> Tuple[int, int]:
+    # with both keys down an axis needs diag_* times its straight time, so both are held until
+    # the shorter axis is covered and the longer one alone finishes the rest
+    tx = abs(dx_ms) * diag_x
+    ty = abs(dy_ms) * diag_y
+    both = min(tx, ty)
+    if tx >= ty:
+        return int(abs(dx_ms) - both / diag_x + both), int(both)
+    return int(both), int(abs(dy_ms) - both / diag_y + both)
+
+
+def run_diagonal(dx_ms: float, dy_ms: float, diag_x: float, diag_y: float):
+    x_ms, y_ms = diagonal_ms(dx_ms, dy_ms, diag_x, diag_y)
+    with metrics.span("input.hold"):
+        hold_keys_ms({_button(True, dx_ms): x_ms, _button(False, dy_ms): y_ms})
+    with metrics.span("sleep.approach"):
+        clock.sleep(APPROACH_PAUSE)
 
 
 class Navigator:
-    def __init__(self, resource: ResourceObject):
+    def __init__(self, resource: ResourceObject, calibration=None):
         self.resource = resource
+        # fitted MoveCalibration for the window's aspect ratio; the step tables are used without one
+        self.calibration = calibration
         self.pos_x = 0
         self.pos_y = 0
 
@@ -32,6 +58,12 @@ class Navigator:
         self.pos_y += int(dy_step)
         logger.debug(f"DY POSITION={self.pos_y} and DX POSITION={self.pos_x}")
 
+    def correct(self, ex: int, ey: int):
+        # dead-reckoning error measured after a move (see VisualOdometry)
+        self.pos_x += int(ex)
+        self.pos_y += int(ey)
+        logger.debug(f"Position corrected by ({ex},{ey}) to ({self.pos_x},{self.pos_y})")
+
     def _calc_adjustment_x(self, value: float) -> float:
         a = abs(value)
         if a > 2500: return value * 0.73
@@ -59,6 +91,8 @@ class Navigator:
         return value * -0.7
 
     def get_dx_dy(self, dx, dy):
+        if self.calibration is not None:
+            return self.calibration.x.ms(dx) * self.resource.mult_x, self.calibration.y.ms(dy) * self.resource.mult_y
         dx_adj = self._calc_adjustment_x(dx)
         dy_adj = self._calc_adjustment_y(dy)
 
@@ -68,28 +102,50 @@ class Navigator:
 
         return (dx + dx_adj) * self.resource.mult_x, (dy + dy_adj) * self.resource.mult_y
 
-    def approach_by_distance(self, dx: int, dy: int, tolerated: bool = True):
-        if dx == 0 and dy == 0:
-            return
+    def _diagonal(self, dx_ms: float, dy_ms: float) -> bool:
+        return DIAGONAL_MOVES_ENABLED and abs(dx_ms) > 0 and abs(dy_ms) > 0 \
+            and self.resource.get_diag_mult_x() > 0 and self.resource.get_diag_mult_y() > 0
+
+    def travel_ms(self, dx: int, dy: int) -> Tuple[float, int]:
+        # key-hold ms and number of APPROACH_PAUSEs approach_by_distance spends on a move
+        dx_ms, dy_ms = self.get_dx_dy(dx, dy)
+        if self._diagonal(dx_ms, dy_ms):
+            return max(diagonal_ms(dx_ms, dy_ms, self.resource.get_diag_mult_x(),
+                                   self.resource.get_diag_mult_y())), 1
+        return abs(dx_ms) + abs(dy_ms), (dx_ms != 0) + (dy_ms != 0)
+
+    def _move(self, dx: int, dy: int, tolerated: bool) -> Tuple[int, int]:
+        # the part of (dx, dy) approach_by_distance actually walks
         if not tolerated:
             dx = dx - self.resource.get_tol_x() if dx > 0 else dx + self.resource.get_tol_x()
             dy = dy - self.resource.get_tol_y() if dy > 0 else dy + self.resource.get_tol_y()
+        return (dx if abs(dx) > self.resource.get_tol_x() else 0,
+                dy if abs(dy) > self.resource.get_tol_y() else 0)
 
-        dy_step = 0
-        dx_step = 0
+    def landing(self, dx: int, dy: int, tolerated: bool = True) -> Tuple[int, int]:
+        # position approach_by_distance(dx, dy, tolerated) would end at
+        mx, my = self._move(dx, dy, tolerated)
+        return self.pos_x + int(mx), self.pos_y + int(my)
 
+    def approach_by_distance(self, dx: int, dy: int, tolerated: bool = True):
+        if dx == 0 and dy == 0:
+            return
+        dx, dy = self._move(dx, dy, tolerated)
         dx_in_ms, dy_in_ms = self.get_dx_dy(dx, dy)
+        if dx and dy and self._diagonal(dx_in_ms, dy_in_ms):
+            run_diagonal(dx_in_ms, dy_in_ms, self.resource.get_diag_mult_x(), self.resource.get_diag_mult_y())
+            self._apply_step(dx, dy)
+            return
+
         # Y axis
-        if abs(dy) > self.resource.get_tol_y():
+        if dy:
             run(False, dy_in_ms)
-            dy_step = dy
 
         # X axis
-        if abs(dx) > self.resource.get_tol_x():
+        if dx:
             run(True, dx_in_ms)
-            dx_step = dx
 
-        self._apply_step(dx_step, dy_step)
+        self._apply_step(dx, dy)
 
     def is_start_position(self):
         return self.pos_x == 0 and self.pos_y == 0
@@ -0,0 +1,65 @@
+# autogather/odometry.py
+import logging
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from autogather.config import ODOMETRY_SCALE, ODOMETRY_MIN_RESPONSE, ODOMETRY_MAX_SHIFT, ODOMETRY_GAIN
+from autogather.model.navigator import Navigator
+
+logger = logging.getLogger(__name__)
+
+
+class VisualOdometry:
+    # Measures how far the view actually moved between a frame before and one after a Navigator move,
+    # by phase correlation of downsampled frames. The camera follows the character, so the scene shifts
+    # by minus the walk; the difference to the commanded step is the dead-reckoning error, which is
+    # taken out of the navigator position (ODOMETRY_GAIN of it). Moves longer than ODOMETRY_MAX_SHIFT
+    # of the frame can't be measured and are left as commanded.
+    def __init__(self, nav: Navigator, scale: float = ODOMETRY_SCALE):
+        self.nav = nav
+        self.scale = scale
+        self.stats = {"moves": 0, "corrected": 0, "weak": 0, "out_of_range": 0,
+                      "drift_px": 0.0, "last_error": (0, 0)}
+        self._window = None
+
+    def _prepare(self, gray) -> np.ndarray:
+        small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        small = np.float32(small)
+        if self._window is None or self._window.shape != small.shape:
+            self._window = cv2.createHanningWindow(small.shape[::-1], cv2.CV_32F)
+        return small
+
+    def measure(self, before, after) -> Optional[Tuple[float, float]]:
+        # the walk (in full-resolution px) that turns `before` into `after`, None if not confident
+        a = self._prepare(before)
+        b = self._prepare(after)
+        if a.shape != b.shape:
+            return None
+        (sx, sy), response = cv2.phaseCorrelate(a, b, self._window)
+        if response < ODOMETRY_MIN_RESPONSE:
+            self.stats["weak"] += 1
+            return None
+        return -sx / self.scale, -sy / self.scale
+
+    def update(self, before, after, commanded: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        # corrects the navigator after a move of `commanded` px; returns the error taken out
+        if before is None or after is None or commanded == (0, 0):
+            return None
+        self.stats["moves"] += 1
+        H, W = before.shape[:2]
+        if abs(commanded[0]) > W * ODOMETRY_MAX_SHIFT or abs(commanded[1]) > H * ODOMETRY_MAX_SHIFT:
+            self.stats["out_of_range"] += 1
+            return None
+        walked = self.measure(before, after)
+        if walked is None:
+            return None
+        ex = int(round((walked[0] - commanded[0]) * ODOMETRY_GAIN))
+        ey = int(round((walked[1] - commanded[1]) * ODOMETRY_GAIN))
+        self.nav.correct(ex, ey)
+        self.stats["corrected"] += 1
+        self.stats["drift_px"] += abs(ex) + abs(ey)
+        self.stats["last_error"] = (ex, ey)
+        logger.debug(f"Odometry: commanded {commanded}, walked ({walked[0]:.0f},{walked[1]:.0f})")
+        return ex, ey
@@ -0,0 +1,81 @@
+# autogather/prompt_detector.py
+from typing import NamedTuple, Optional
+
+import cv2
+
+from autogather import clock
+from autogather.config import SCALES, MATCH_THRESHOLD, PROMPT_DIFF_TOLERANCE, PROMPT_DIFF_SIZE, \
+    PROMPT_DIFF_MAX_AGE_SEC
+from autogather.model.match_executor import MatchExecutor
+from autogather.model.templates import TemplateSet
+
+
+class PromptHits(NamedTuple):
+    focus: Optional[dict]
+    gathering: Optional[dict]
+    selector: Optional[dict]
+
+    @property
+    def any_prompt(self) -> bool:
+        return bool((self.focus or self.gathering) and self.selector)
+
+
+NO_PROMPT = PromptHits(None, None, None)
+
+
+class PromptDetector:
+    def __init__(self, ts_focus: TemplateSet, ts_gath: TemplateSet, ts_sel: TemplateSet, matcher: MatchExecutor,
+                 diff_tolerance: Optional[float] = PROMPT_DIFF_TOLERANCE):
+        self.ts_focus = ts_focus
+        self.ts_gath = ts_gath
+        self.ts_sel = ts_sel
+        self.matcher = matcher
+        # grey-level change under which the last result is reused; None disables the gate
+        self.diff_tolerance = diff_tolerance
+        self.stats = {"checks": 0, "selector_misses": 0, "reused": 0}
+        self._sig = None
+        self._prev_sig = None
+        self._last_hits = NO_PROMPT
+        self._last_at = 0.0
+        self._version = None
+
+    def hit_rate(self) -> float:
+        return self.stats["reused"] / self.stats["checks"] if self.stats["checks"] else 0.0
+
+    def _unchanged(self, roi) -> bool:
+        # thumbnail of the ROI compared against the one from the last full detection
+        if self._sig is None or self._sig.shape[:2] != PROMPT_DIFF_SIZE[::-1]:
+            self._sig = cv2.resize(roi, PROMPT_DIFF_SIZE, interpolation=cv2.INTER_AREA)
+        else:
+            cv2.resize(roi, PROMPT_DIFF_SIZE, dst=self._sig, interpolation=cv2.INTER_AREA)
+        if self._prev_sig is None or clock.now() - self._last_at > PROMPT_DIFF_MAX_AGE_SEC:
+            return False
+        # largest change of any thumbnail cell: a prompt appearing is local, a mean would dilute it
+        return cv2.norm(self._sig, self._prev_sig, cv2.NORM_INF) <= self.diff_tolerance
+
+    def detect(self, roi, version: Optional[int] = None) -> PromptHits:
+        # version: the screen geometry the ROI was cut with; a new one means the reused result is stale
+        if roi is None:
+            return NO_PROMPT
+        self.stats["checks"] += 1
+        if version != self._version:
+            self._version = version
+            self._prev_sig = None
+        if self.diff_tolerance is not None:
+            if self._unchanged(roi):
+                self.stats["reused"] += 1
+                return self._last_hits
+            self._sig, self._prev_sig = self._prev_sig, self._sig
+            self._last_at = clock.now()
+        self._last_hits = self._match(roi)
+        return self._last_hits
+
+    def _match(self, roi) -> PromptHits:
+        # every use of the hits (any_prompt, scroll alignment) needs the selector,
+        # so focus/gathering are only matched once the selector is on screen
+        hit_s = self.matcher.best_match(roi, self.ts_sel, SCALES, MATCH_THRESHOLD) if self.ts_sel else None
+        if not hit_s:
+            self.stats["selector_misses"] += 1
+            return NO_PROMPT
+        hit_f, hit_g = self.matcher.best_matches(roi, [self.ts_focus, self.ts_gath], SCALES, MATCH_THRESHOLD)
+        return PromptHits(hit_f, hit_g, hit_s)
@@ -1,3 +1,4 @@
+from autogather.config import DIAGONAL_MULT
 from autogather.enums.direction import Direction
 
 
@@ -11,7 +12,9 @@ class ResourceObject:
             tol_y: int,
             is_focus_needed: bool = True,
             adjust_every_cycle: bool = False,
-            adjust_dir: Direction = Direction.NONE
+            adjust_dir: Direction = Direction.NONE,
+            diag_mult_x: float = DIAGONAL_MULT,
+            diag_mult_y: float = DIAGONAL_MULT
     ):
         self.folder = folder
         self.mult_x = mult_x
@@ -21,6 +24,8 @@ class ResourceObject:
         self.is_focus_needed = is_focus_needed
         self.adjust_dir = adjust_dir
         self.adjust_every_cycle = adjust_every_cycle
+        self.diag_mult_x = diag_mult_x
+        self.diag_mult_y = diag_mult_y
         print("[Resource] Created:", self)
 
     @property
@@ -34,6 +39,12 @@ class ResourceObject:
     def get_mult_y(self) -> float:
         return self.mult_y
 
+    def get_diag_mult_x(self) -> float:
+        return self.diag_mult_x
+
+    def get_diag_mult_y(self) -> float:
+        return self.diag_mult_y
+
     def get_tol_x(self) -> int:
         return self.tol_x
 
@@ -50,6 +61,7 @@ class ResourceObject:
         return (
             f"Resource(folder='{self.folder}', "
             f"mult_x={self.mult_x}, mult_y={self.mult_y}, "
+            f"diag_mult_x={self.diag_mult_x}, diag_mult_y={self.diag_mult_y}, "
             f"tol_x={self.tol_x}, tol_y={self.tol_y}, "
             f"is_focus_needed={self.is_focus_needed})"
         )
@@ -0,0 +1,57 @@
+# autogather/respawn.py
+from typing import Optional
+
+from autogather.config import RESPAWN_MIN_SEC, RESPAWN_MAX_SEC, RESPAWN_RESOLUTION_SEC
+
+
+class RespawnBounds:
+    # What visits tell about a respawn interval: a node found gathered-again after g seconds
+    # respawns within g (hi), a node found empty after g seconds needs longer than g (lo).
+    def __init__(self, lo: float = 0.0, hi: Optional[float] = None):
+        self.lo = lo
+        self.hi = hi
+
+    def observe(self, present: bool, gap: float) -> bool:
+        # returns True when the bounds moved
+        if present:
+            if self.hi is None or gap < self.hi:
+                self.hi = gap
+                return True
+        elif gap > self.lo:
+            self.lo = gap
+            return True
+        return False
+
+    def known(self) -> bool:
+        return self.lo > 0 or self.hi is not None
+
+    def consistent(self) -> bool:
+        return self.hi is None or self.lo < self.hi
+
+    def narrowed(self, other: "RespawnBounds") -> "RespawnBounds":
+        hi = self.hi if other.hi is None else other.hi if self.hi is None else min(self.hi, other.hi)
+        return RespawnBounds(max(self.lo, other.lo), hi)
+
+    def estimate(self, prior: float) -> float:
+        # next revisit time: bisect the bracket while it is wide, so every visit halves it
+        if not self.known():
+            return prior
+        if self.hi is None:
+            return min(RESPAWN_MAX_SEC, max(prior, self.lo * 2))
+        lo = max(self.lo, RESPAWN_MIN_SEC)
+        if self.hi - lo <= RESPAWN_RESOLUTION_SEC:
+            return self.hi
+        return (lo + self.hi) / 2
+
+    def confidence(self) -> float:
+        if self.hi is None or self.lo <= 0:
+            return 0.25 if self.known() else 0.0
+        return round(max(0.0, 1 - (self.hi - self.lo) / self.hi), 3)
+
+    def as_dict(self, prior: float) -> dict:
+        return {
+            "lo": round(self.lo, 2),
+            "hi": None if self.hi is None else round(self.hi, 2),
+            "estimate_sec": round(self.estimate(prior), 2),
+            "confidence": self.confidence(),
+        }
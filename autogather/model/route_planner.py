@@ -0,0 +1,126 @@
+# autogather/route_planner.py
+import itertools
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from autogather import clock
+from autogather.config import APPROACH_PAUSE, ROUTE_HORIZON_SEC, ROUTE_MAX_NODES, ROUTE_LOOKAHEAD, ROUTE_BRANCH, \
+    ROUTE_ROLLOUTS, ROUTE_ROLLOUT_GATHERS
+from autogather.model.navigator import Navigator
+from autogather.model.waypoints import Node, WaypointDB
+
+logger = logging.getLogger(__name__)
+
+
+class RoutePlanner:
+    # Orders the known nodes into a visiting plan. Cost is time: travel in key-hold time from
+    # Navigator.travel_ms, waiting for nodes still respawning, and the gather itself.
+    # The first ROUTE_LOOKAHEAD stops are searched among the ROUTE_BRANCH most promising nodes and the
+    # rest follow nearest-first; the ROUTE_ROLLOUTS best starts are compared by playing them out.
+    # Planned again at every decision, so new nodes are picked up at once.
+    def __init__(self, db: WaypointDB, nav: Navigator, service_sec: float,
+                 horizon_sec: float = ROUTE_HORIZON_SEC, max_nodes: int = ROUTE_MAX_NODES):
+        self.db = db
+        self.nav = nav
+        self.service_sec = service_sec
+        self.horizon_sec = horizon_sec
+        self.max_nodes = max_nodes
+        self.plan: List[Node] = []
+        # (dx, dy) -> seconds for the current plan; travel_ms only depends on the move and the multipliers
+        self._travel: Dict[Tuple[int, int], float] = {}
+
+    # ---- cost model ----
+    def travel_sec(self, x1: int, y1: int, x2: int, y2: int) -> float:
+        key = (x2 - x1, y2 - y1)
+        sec = self._travel.get(key)
+        if sec is None:
+            ms, pauses = self.nav.travel_ms(*key)
+            sec = self._travel[key] = ms / 1000.0 + pauses * APPROACH_PAUSE
+        return sec
+
+    def finish_time(self, pos: Tuple[int, int], t: float, seq) -> float:
+        x, y = pos
+        for n in seq:
+            t += self.travel_sec(x, y, n.x, n.y)
+            t = max(t, self.db.ready_at(n)) + self.service_sec
+            x, y = n.x, n.y
+        return t
+
+    def _start_delay(self, pos: Tuple[int, int], now: float, n: Node) -> float:
+        # time until a gather could start at n: the walk, or the respawn if that is later
+        return max(self.travel_sec(pos[0], pos[1], n.x, n.y), self.db.ready_at(n) - now)
+
+    # ---- planning ----
+    def _complete(self, pos: Tuple[int, int], prefix, candidates: List[Node]) -> List[Node]:
+        # prefix, then the other candidates nearest-first
+        plan = list(prefix)
+        rest = [n for n in candidates if n not in prefix]
+        x, y = (plan[-1].x, plan[-1].y) if plan else pos
+        while rest:
+            n = min(rest, key=lambda c: self.travel_sec(x, y, c.x, c.y))
+            rest.remove(n)
+            plan.append(n)
+            x, y = n.x, n.y
+        return plan
+
+    def replan(self, pos: Tuple[int, int], now: float) -> List[Node]:
+        # node pairs repeat within a plan, not across plans: the node set changes with every gather
+        self._travel = {}
+        candidates = sorted(self.db.upcoming(now + self.horizon_sec), key=lambda n: self._start_delay(pos, now, n))
+        candidates = candidates[:self.max_nodes]
+        if not candidates:
+            self.plan = []
+            return self.plan
+        branch = candidates[:ROUTE_BRANCH]
+        depth = min(ROUTE_LOOKAHEAD, len(branch))
+        prefixes = sorted(itertools.permutations(branch, depth), key=lambda seq: self.finish_time(pos, now, seq))
+        # the best prefixes and the plain nearest-ready start are played out over the same number of
+        # gathers, with gathered nodes respawning; the fastest wins, so the plan never trails nearest-ready
+        starts = [()] + prefixes[:ROUTE_ROLLOUTS]
+        best = min(starts, key=lambda seq: self._rollout(pos, now, seq, candidates))
+        self.plan = self._complete(pos, best, candidates)
+        return self.plan
+
+    def _rollout(self, pos: Tuple[int, int], now: float, prefix, nodes: List[Node]) -> float:
+        # time until ROUTE_ROLLOUT_GATHERS gathers are done: the prefix, then each time the nearest node
+        # that is ready on arrival, or the one that can be started soonest when none is
+        ready = {n: self.db.ready_at(n) for n in nodes}
+        x, y = pos
+        t = now
+        for i in range(ROUTE_ROLLOUT_GATHERS):
+            if i < len(prefix):
+                n = prefix[i]
+            else:
+                due = [c for c in nodes if t + self.travel_sec(x, y, c.x, c.y) >= ready[c]]
+                if due:
+                    n = min(due, key=lambda c: self.travel_sec(x, y, c.x, c.y))
+                else:
+                    n = min(nodes, key=lambda c: max(self.travel_sec(x, y, c.x, c.y), ready[c] - t))
+            t = max(t + self.travel_sec(x, y, n.x, n.y), ready[n]) + self.service_sec
+            ready[n] = t + self.db.respawn_sec(n)
+            x, y = n.x, n.y
+        return t
+
+    def next(self, curx: int, cury: int) -> Optional[Node]:
+        # first planned node, once setting off now would not arrive before it respawns. If it would,
+        # the nearest node that is ready by arrival goes first and the rest is planned from there.
+        now = clock.now()
+        plan = self.replan((curx, cury), now)
+        if not plan:
+            return None
+
+        def ready_on_arrival(n: Node) -> bool:
+            return now + self.travel_sec(curx, cury, n.x, n.y) >= self.db.ready_at(n)
+
+        pick = plan[0]
+        if not ready_on_arrival(pick):
+            pick = min((n for n in plan if ready_on_arrival(n)),
+                       key=lambda n: self.travel_sec(curx, cury, n.x, n.y), default=None)
+            if pick is None:
+                return None
+            self.db.take(pick)
+            self.replan((pick.x, pick.y), now + self.travel_sec(curx, cury, pick.x, pick.y) + self.service_sec)
+            return pick
+        self.plan.pop(0)
+        self.db.take(pick)
+        return pick
@@ -1,46 +1,313 @@
 import logging
 import os
+import time
+from typing import Dict, List, Optional, Tuple
 
 import cv2
+import numpy as np
 
-from autogather.config import IMG_EXTS
+from autogather.config import IMG_EXTS, TEMPLATE_RELOAD_CHECK_SEC, TEMPLATE_MIN_SIZE, ADAPTIVE_MISS_STREAK, \
+    COARSE_FACTOR, COARSE_THRESHOLD_DROP, COARSE_CANDIDATES, COARSE_REFINE_MARGIN, FIND_ALL_MAX_PEAKS, FIND_ALL_OVERLAP, \
+    FEATURE_SCALE_STEP
+from autogather.enums.match_strategy import MatchStrategy
+from autogather.model.compaction import Compaction, compact
+from autogather.model.features import FeatureIndex
 
 logger = logging.getLogger(__name__)
 
 
+def _overlap(a, b) -> float:
+    # intersection over the smaller box, so a template cropped from another still counts as the same object
+    (ax1, ay1), (ax2, ay2) = a
+    (bx1, by1), (bx2, by2) = b
+    iw = min(ax2, bx2) - max(ax1, bx1)
+    ih = min(ay2, by2) - max(ay1, by1)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    smaller = min((ax2 - ax1) * (ay2 - ay1), (bx2 - bx1) * (by2 - by1))
+    return iw * ih / smaller if smaller > 0 else 0.0
+
+
+def suppress(cands: List[dict], overlap: float = FIND_ALL_OVERLAP) -> List[dict]:
+    # non-maximum suppression: strongest first, dropping every box that overlaps a kept one
+    kept = []
+    for c in sorted(cands, key=lambda c: c["score"], reverse=True):
+        if all(_overlap(c["box"], k["box"]) <= overlap for k in kept):
+            kept.append(c)
+    return kept
+
+
 class TemplateSet:
-    def __init__(self, directory: str):
+    def __init__(self, directory: str, adaptive: bool = False, strategy: MatchStrategy = MatchStrategy.FULL,
+                 compacted: bool = False):
         self.tmps = []
         self.directory = directory
-        if directory is not None and os.path.isdir(directory):
-            for n in os.listdir(directory):
-                if n.lower().endswith(IMG_EXTS):
-                    p = os.path.join(directory, n)
-                    g = cv2.imread(p, cv2.IMREAD_GRAYSCALE)
-                    if g is not None and g.size > 0:
-                        self.tmps.append(g)
+        self.name = os.path.basename(os.path.normpath(directory)).lower() if directory else "templates"
+        self.strategy = strategy
+        # keep only the templates that aren't found by another one in the folder (see compaction.py)
+        self.compacted = compacted
+        self.compaction: Optional[Compaction] = None
+        # try (template, scale) pairs that matched before, widen to all scales after a miss streak
+        self.adaptive = adaptive
+        self._wins: Dict[Tuple[int, float], int] = {}
+        self._miss_streak = 0
+        self.stats = {"hits": 0, "misses": 0, "full_scans": 0, "pairs_tried": 0, "pairs_skipped": 0}
+        self._signature: Optional[Tuple] = None
+        self._checked_at = 0.0
+        # scale -> scaled copy of every template (None when too small to match)
+        self._pyramid: Dict[float, List] = {}
+        self._features: Optional[FeatureIndex] = None
+        self._load()
 
-    def best_match(self, gray_roi, scales, threshold):
+    def _folder_signature(self) -> Optional[Tuple]:
+        if self.directory is None or not os.path.isdir(self.directory):
+            return None
+        sig = []
+        for n in sorted(os.listdir(self.directory)):
+            if n.lower().endswith(IMG_EXTS):
+                st = os.stat(os.path.join(self.directory, n))
+                sig.append((n, st.st_mtime_ns, st.st_size))
+        return tuple(sig)
+
+    def _load(self):
+        self.tmps = []
+        self.compaction = None
+        self._pyramid = {}
+        self._features = None
+        self._wins = {}
+        self._miss_streak = 0
+        self._signature = self._folder_signature()
+        self._checked_at = time.time()
+        if self._signature is None:
+            return
+        for n, _, _ in self._signature:
+            p = os.path.join(self.directory, n)
+            g = cv2.imread(p, cv2.IMREAD_GRAYSCALE)
+            if g is not None and g.size > 0:
+                self.tmps.append(g)
+        if self.compacted and len(self.tmps) > 1:
+            self.compaction = compact(self.tmps)
+            self.tmps = [self.tmps[i] for i in self.compaction.keep]
+            logger.debug(f"{self.name}: {len(self.tmps)} of {len(self.compaction.matrix)} templates kept "
+                         f"after compaction ({self.directory})")
+
+    def _reload_if_changed(self):
+        now = time.time()
+        if now - self._checked_at < TEMPLATE_RELOAD_CHECK_SEC:
+            return
+        self._checked_at = now
+        if self._folder_signature() != self._signature:
+            logger.info(f"Templates changed, reloading: {self.directory}")
+            self._load()
+
+    def scaled(self, s: float) -> List:
+        level = self._pyramid.get(s)
+        if level is None:
+            level = []
+            for g in self.tmps:
+                tw, th = int(g.shape[1] * s), int(g.shape[0] * s)
+                if tw < TEMPLATE_MIN_SIZE or th < TEMPLATE_MIN_SIZE:
+                    level.append(None)
+                else:
+                    level.append(cv2.resize(g, (tw, th), interpolation=cv2.INTER_AREA))
+            self._pyramid[s] = level
+        return level
+
+    def _pairs(self, scales) -> List[Tuple[int, float]]:
+        return [(idx, sc) for idx in range(len(self.tmps)) for sc in scales]
+
+    def _learned_pairs(self, scales) -> List[Tuple[int, float]]:
+        # the scale follows the window size and is shared by every template in the set,
+        # so the other templates are tried at the learned scales too, after the winners
+        ranked = [p for p in sorted(self._wins, key=self._wins.get, reverse=True) if p[1] in scales]
+        learned_scales = list(dict.fromkeys(sc for _, sc in ranked))
+        rest = [(idx, sc) for sc in learned_scales for idx in range(len(self.tmps)) if (idx, sc) not in self._wins]
+        return ranked + rest
+
+    def _record(self, best):
+        if best:
+            key = (best["template"], best["scale"])
+            self._wins[key] = self._wins.get(key, 0) + 1
+            self.stats["hits"] += 1
+        else:
+            self.stats["misses"] += 1
+
+    def plan(self, scales) -> Tuple[List[Tuple[int, float]], bool]:
+        # (template, scale) pairs to try for the next frame, and whether that is a full scan
+        self._reload_if_changed()
         if self.tmps is None or len(self.tmps) == 0:
+            return [], True
+        if self.adaptive:
+            learned = self._learned_pairs(scales)
+            if learned and self._miss_streak < ADAPTIVE_MISS_STREAK:
+                self.stats["pairs_skipped"] += len(self.tmps) * len(scales) - len(learned)
+                return learned, False
+            self.stats["full_scans"] += 1
+        return self._pairs(scales), True
+
+    def finish(self, best, full_scan: bool):
+        self._record(best)
+        if self.adaptive:
+            self._miss_streak = 0 if best or full_scan else self._miss_streak + 1
+
+    @property
+    def features(self) -> FeatureIndex:
+        if self._features is None:
+            self._features = FeatureIndex(self.tmps)
+        return self._features
+
+    def prepare(self, gray):
+        # per-frame data shared by every (template, scale) pair
+        if self.strategy in (MatchStrategy.PYRAMID, MatchStrategy.FEATURES):
+            H, W = gray.shape[:2]
+            small = cv2.resize(gray, (int(W * COARSE_FACTOR), int(H * COARSE_FACTOR)),
+                               interpolation=cv2.INTER_AREA)
+            return gray, small
+        return gray, None
+
+    def best_match(self, gray_roi, scales, threshold):
+        if self.strategy == MatchStrategy.FEATURES:
+            hits = self._feature_hits(gray_roi, scales, threshold, False)
+            return hits[0] if hits else None
+        pairs, full_scan = self.plan(scales)
+        if not pairs:
             return None
+        best = self._scan(self.prepare(gray_roi), pairs, threshold)
+        self.finish(best, full_scan)
+        return best
+
+    def find_all(self, gray_roi, scales, threshold) -> List[dict]:
+        # every object above threshold across templates and scales, strongest first; no early exit
+        if self.strategy == MatchStrategy.FEATURES:
+            return self._feature_hits(gray_roi, scales, threshold, True)
+        pairs, full_scan = self.plan(scales)
+        if not pairs:
+            return []
+        frame = self.prepare(gray_roi)
+        cands = []
+        for idx, sc in pairs:
+            tried, found = self.match_pair_all(frame, idx, sc, threshold)
+            if tried:
+                self.stats["pairs_tried"] += 1
+            cands.extend(found)
+        hits = suppress(cands)
+        self.finish(hits[0] if hits else None, full_scan)
+        return hits
+
+    def _feature_hits(self, gray, scales, threshold, find_all: bool) -> List[dict]:
+        # keypoint placements verified by one matchTemplate at the fitted scale; templates without
+        # enough keypoints are scanned over the listed scales, coarse-to-fine, as before
+        self._reload_if_changed()
+        if not self.tmps:
+            return []
+        index = self.features
+        frame = self.prepare(gray)
+        H, W = gray.shape[:2]
+        m = COARSE_REFINE_MARGIN
+        cands = []
+        for idx, sc, ((x1, y1), (x2, y2)) in index.candidates(gray):
+            sc = round(sc / FEATURE_SCALE_STEP) * FEATURE_SCALE_STEP
+            t = self.scaled(sc)[idx] if sc > 0 else None
+            if t is None:
+                continue
+            th, tw = t.shape[:2]
+            cx, cy = (x1 + x2) // 2, (y1 + y2) // 2
+            wx0, wy0 = max(0, cx - tw // 2 - m), max(0, cy - th // 2 - m)
+            wx1, wy1 = min(W, cx + tw - tw // 2 + m), min(H, cy + th - th // 2 + m)
+            if wx1 - wx0 < tw or wy1 - wy0 < th:
+                continue
+            self.stats["pairs_tried"] += 1
+            res = cv2.matchTemplate(gray[wy0:wy1, wx0:wx1], t, cv2.TM_CCOEFF_NORMED)
+            _, mx, _, ml = cv2.minMaxLoc(res)
+            if mx >= threshold:
+                tl = (wx0 + ml[0], wy0 + ml[1])
+                cands.append({"score": float(mx), "box": (tl, (tl[0] + tw, tl[1] + th)), "template": idx,
+                              "scale": sc})
+        # a keypoint placement that verifies settles the frame; otherwise every template is scanned
+        # (small or plain objects often yield no usable keypoints in a frame)
+        skip = set(index.usable) if cands else set()
+        for idx in range(len(self.tmps)):
+            if idx in skip:
+                continue
+            for sc in scales:
+                if not find_all and any(c["score"] >= 0.9 for c in cands):
+                    break
+                tried, found = self._match(frame, idx, sc, threshold, FIND_ALL_MAX_PEAKS if find_all else 1,
+                                           FIND_ALL_MAX_PEAKS if find_all else COARSE_CANDIDATES)
+                if tried:
+                    self.stats["pairs_tried"] += 1
+                cands.extend(found)
+        hits = suppress(cands)
+        self._record(hits[0] if hits else None)
+        return hits
+
+    def _scan(self, frame, pairs, threshold):
         best = None
-        H, W = gray_roi.shape[:2]
-        for idx, g in enumerate(self.tmps):
-            for s in scales:
-                tw, th = int(g.shape[1] * s), int(g.shape[0] * s)
-                if tw < 12 or th < 12 or tw >= W or th >= H:
-                    continue
-                t = cv2.resize(g, (tw, th), interpolation=cv2.INTER_AREA)
-                res = cv2.matchTemplate(gray_roi, t, cv2.TM_CCOEFF_NORMED)
+        for idx, sc in pairs:
+            tried, cand = self.match_pair(frame, idx, sc, threshold)
+            if tried:
+                self.stats["pairs_tried"] += 1
+            if cand and (not best or cand["score"] > best["score"]):
+                best = cand
+                if best["score"] >= 0.9:
+                    return best
+        return best
+
+    def match_pair(self, frame, idx: int, sc: float, threshold: float) -> Tuple[bool, Optional[dict]]:
+        tried, found = self._match(frame, idx, sc, threshold, 1, COARSE_CANDIDATES)
+        return tried, max(found, key=lambda c: c["score"], default=None)
+
+    def match_pair_all(self, frame, idx: int, sc: float, threshold: float) -> Tuple[bool, List[dict]]:
+        return self._match(frame, idx, sc, threshold, FIND_ALL_MAX_PEAKS, FIND_ALL_MAX_PEAKS)
+
+    def _match(self, frame, idx: int, sc: float, threshold: float, count: int,
+               coarse_count: int) -> Tuple[bool, List[dict]]:
+        gray, small = frame
+        t = self.scaled(sc)[idx]
+        if t is None:
+            return False, []
+        H, W = gray.shape[:2]
+        th, tw = t.shape[:2]
+        if tw >= W or th >= H:
+            return False, []
+
+        def hit(score, tl):
+            return {"score": float(score), "box": (tl, (tl[0] + tw, tl[1] + th)), "template": idx, "scale": sc}
+
+        tc = self.scaled(sc * COARSE_FACTOR)[idx] if small is not None else None
+        if tc is None or tc.shape[1] >= small.shape[1] or tc.shape[0] >= small.shape[0]:
+            # full strategy, or too small to survive downsampling
+            res = cv2.matchTemplate(gray, t, cv2.TM_CCOEFF_NORMED)
+            if count == 1:
                 _, mx, _, ml = cv2.minMaxLoc(res)
+                return True, [hit(mx, ml)] if mx >= threshold else []
+            return True, [hit(mx, ml) for mx, ml in self._peaks(res, threshold, count, tw, th)]
 
-                if mx >= threshold:
-                    tl = (ml[0], ml[1])
-                    br = (tl[0] + tw, ml[1] + th)
-                    cand = {"score": float(mx), "box": (tl, br)}
-                    if not best or cand["score"] > best["score"]:
-                        best = cand
-                        if best["score"] >= 0.9:
-                            return best
+        # coarse-to-fine: refine the coarse peaks at full resolution in small windows
+        m = COARSE_REFINE_MARGIN + int(np.ceil(1 / COARSE_FACTOR))
+        res = cv2.matchTemplate(small, tc, cv2.TM_CCOEFF_NORMED)
+        found = []
+        for _, (x, y) in self._peaks(res, threshold - COARSE_THRESHOLD_DROP, coarse_count,
+                                     tc.shape[1], tc.shape[0]):
+            gx, gy = int(x / COARSE_FACTOR), int(y / COARSE_FACTOR)
+            x0, y0 = max(0, gx - m), max(0, gy - m)
+            x1, y1 = min(W, gx + tw + m), min(H, gy + th + m)
+            res_fine = cv2.matchTemplate(gray[y0:y1, x0:x1], t, cv2.TM_CCOEFF_NORMED)
+            _, mx, _, ml = cv2.minMaxLoc(res_fine)
+            if mx >= threshold:
+                found.append(hit(mx, (x0 + ml[0], y0 + ml[1])))
+        return True, found
 
-        return best
+    @staticmethod
+    def _peaks(res, threshold: float, count: int, tw: int, th: int) -> List[Tuple[float, Tuple[int, int]]]:
+        # strongest local maxima, each one suppressing a template-sized neighbourhood
+        res = res.copy()
+        out = []
+        for _ in range(count):
+            _, mx, _, ml = cv2.minMaxLoc(res)
+            if mx < threshold:
+                break
+            out.append((float(mx), ml))
+            x, y = ml
+            res[max(0, y - th // 2):y + th // 2 + 1, max(0, x - tw // 2):x + tw // 2 + 1] = -1.0
+        return out
@@ -0,0 +1,82 @@
+# autogather/tracker.py
+import logging
+from typing import Optional, Tuple
+
+import cv2
+
+from autogather.config import SCALES, RESOURCE_THRESHOLD, TRACK_MARGIN_PX, TRACK_MOVE_SLACK, TRACK_SCALE_STEPS
+from autogather.model.navigator import Navigator
+from autogather.model.templates import TemplateSet
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceTracker:
+    # Follows the last resource the worker locked onto. Its position is kept in navigator coordinates,
+    # so every move made through the Navigator since predicts where it is on screen; the next lookup
+    # matches only the locked template, at the locked scale and its neighbours, in a window around that.
+    # The window grows with the distance walked, since moves land only roughly where they aim.
+    def __init__(self, ts: TemplateSet, nav: Navigator, threshold: float = RESOURCE_THRESHOLD):
+        self.ts = ts
+        self.nav = nav
+        self.threshold = threshold
+        self.stats = {"tracked": 0, "lost": 0, "window_px": 0, "frame_px": 0}
+        self._hit: Optional[dict] = None
+        # resource centre in navigator coordinates, and where the navigator was when it was seen
+        self._world: Tuple[int, int] = (0, 0)
+        self._seen_from: Tuple[int, int] = (0, 0)
+
+    @property
+    def locked(self) -> bool:
+        return self._hit is not None
+
+    def reset(self):
+        self._hit = None
+
+    def lock(self, hit: dict, shape):
+        H, W = shape[:2]
+        (x1, y1), (x2, y2) = hit["box"]
+        self._hit = hit
+        self._world = (self.nav.pos_x + (x1 + x2) // 2 - W // 2, self.nav.pos_y + (y1 + y2) // 2 - H // 2)
+        self._seen_from = (self.nav.pos_x, self.nav.pos_y)
+
+    def _scales(self):
+        sc = self._hit["scale"]
+        if sc not in SCALES:
+            return [sc]
+        i = SCALES.index(sc)
+        return SCALES[max(0, i - TRACK_SCALE_STEPS):i + TRACK_SCALE_STEPS + 1]
+
+    def track(self, gray) -> Optional[dict]:
+        if self._hit is None:
+            return None
+        H, W = gray.shape[:2]
+        cx = self._world[0] - self.nav.pos_x + W // 2
+        cy = self._world[1] - self.nav.pos_y + H // 2
+        walked = abs(self.nav.pos_x - self._seen_from[0]) + abs(self.nav.pos_y - self._seen_from[1])
+        margin = TRACK_MARGIN_PX + int(walked * TRACK_MOVE_SLACK)
+        idx = self._hit["template"]
+        best = None
+        for sc in self._scales():
+            t = self.ts.scaled(sc)[idx] if idx < len(self.ts.tmps) else None
+            if t is None:
+                continue
+            th, tw = t.shape[:2]
+            x0, y0 = max(0, cx - tw // 2 - margin), max(0, cy - th // 2 - margin)
+            x1, y1 = min(W, cx + tw - tw // 2 + margin), min(H, cy + th - th // 2 + margin)
+            if x1 - x0 <= tw or y1 - y0 <= th:
+                continue
+            self.stats["window_px"] += (x1 - x0) * (y1 - y0)
+            self.stats["frame_px"] += W * H
+            res = cv2.matchTemplate(gray[y0:y1, x0:x1], t, cv2.TM_CCOEFF_NORMED)
+            _, mx, _, ml = cv2.minMaxLoc(res)
+            if mx >= self.threshold and (best is None or mx > best["score"]):
+                tl = (x0 + ml[0], y0 + ml[1])
+                best = {"score": float(mx), "box": (tl, (tl[0] + tw, tl[1] + th)), "template": idx, "scale": sc}
+        if best is None:
+            self.stats["lost"] += 1
+            self._hit = None
+            return None
+        self.stats["tracked"] += 1
+        self.lock(best, gray.shape)
+        return best
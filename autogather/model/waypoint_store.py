@@ -0,0 +1,113 @@
+# autogather/waypoint_store.py
+import json
+import logging
+import os
+import re
+from typing import Optional
+
+from autogather.config import WAYPOINT_MAPS_DIR
+from autogather.model.waypoints import Node, WaypointDB
+
+logger = logging.getLogger(__name__)
+
+
+def route_path(resource_folder: str, route: str, root: str = WAYPOINT_MAPS_DIR) -> str:
+    safe = re.sub(r"[^A-Za-z0-9_-]+", "_", route.strip()) or "default"
+    return os.path.join(root, resource_folder, f"{safe}.jsonl")
+
+
+class WaypointStore:
+    # Append-only JSON-lines log of a WaypointDB: {"n": [x, y, t, lo, hi, visits, misses]} is a node
+    # as saved by compaction (older maps have just [x, y, t]), {"x", "y", "t"} an add_or_update call,
+    # {"s": [x, y]} a node seen by a scan, {"o": [x, y, t, present]} a visit observation
+    # and {"rm": [x, y]} a removal.
+    # Loading replays the log and rewrites the file with one "n" line per surviving node.
+    def __init__(self, path: str):
+        self.path = path
+        self._f = None
+
+    def load_into(self, db: WaypointDB) -> int:
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                for i, line in enumerate(f, 1):
+                    try:
+                        self._apply(db, json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        # a crash can leave the last line half written
+                        logger.warning(f"Skipping bad line {i} in {self.path}")
+            self._compact(db)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._f = open(self.path, "a", encoding="utf-8")
+        db.store = self
+        logger.info(f"Waypoint map {self.path}: {len(db)} nodes")
+        return len(db)
+
+    @staticmethod
+    def _apply(db: WaypointDB, rec: dict):
+        if "n" in rec:
+            db.insert(*rec["n"])
+        elif "s" in rec:
+            db.add_seen(*rec["s"])
+        elif "o" in rec:
+            x, y, t, present = rec["o"]
+            n = db.node_at(x, y)
+            if n is not None:
+                db.observe(n, bool(present), t)
+        elif "rm" in rec:
+            x, y = rec["rm"]
+            n = db.node_at(x, y)
+            if n is not None:
+                db.remove(n)
+        else:
+            db.add_or_update(rec["x"], rec["y"], rec["t"])
+
+    def _compact(self, db: WaypointDB):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for n in db.nodes:
+                b = n.respawn
+                f.write(json.dumps({"n": [n.x, n.y, round(n.last_collected, 3), round(b.lo, 3),
+                                          None if b.hi is None else round(b.hi, 3), n.visits, n.misses]}) + "\n")
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _update_line(x: int, y: int, t: float) -> str:
+        return json.dumps({"x": x, "y": y, "t": round(t, 3)}) + "\n"
+
+    def _write(self, line: str):
+        if self._f is None:
+            return
+        try:
+            self._f.write(line)
+            self._f.flush()
+        except OSError as e:
+            logger.warning(f"Could not write waypoint map {self.path}: {e}")
+
+    def updated(self, x: int, y: int, t: float):
+        self._write(self._update_line(x, y, t))
+
+    def seen(self, x: int, y: int):
+        self._write(json.dumps({"s": [x, y]}) + "\n")
+
+    def observed(self, n: Node, present: bool, t: float):
+        self._write(json.dumps({"o": [n.x, n.y, round(t, 3), int(present)]}) + "\n")
+
+    def removed(self, n: Node):
+        self._write(json.dumps({"rm": [n.x, n.y]}) + "\n")
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+            self._f = None
+
+
+def open_route(resource_folder: str, route: Optional[str], db: WaypointDB) -> Optional[WaypointStore]:
+    if not WAYPOINT_MAPS_DIR or not route:
+        return None
+    store = WaypointStore(route_path(resource_folder, route))
+    try:
+        store.load_into(db)
+    except OSError as e:
+        logger.warning(f"Waypoint map disabled: {e}")
+        return None
+    return store
@@ -1,23 +1,167 @@
 # autogather/waypoints.py
 from __future__ import annotations
 
-import time
-from dataclasses import dataclass
-from typing import List, Optional, Tuple
+import heapq
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
 
-from autogather.config import NODE_MIN_REVISIT_SEC, NODE_MERGE_RADIUS_PX
+from autogather import clock
+from autogather.config import NODE_MIN_REVISIT_SEC, NODE_MERGE_RADIUS_PX, RESPAWN_LEARNING_ENABLED, \
+    RESPAWN_MIN_SEC, RESPAWN_MAX_SEC, RESPAWN_MAX_MISSES
+from autogather.model.respawn import RespawnBounds
 
+Cell = Tuple[int, int]
 
-@dataclass
+
+@dataclass(eq=False)
 class Node:
     x: int
     y: int
-    last_collected: float  # unix time
+    last_collected: float  # unix time; 0 for a node seen on screen but not gathered yet
+    respawn: RespawnBounds = field(default_factory=RespawnBounds)
+    visits: int = 0
+    misses: int = 0  # visits in a row that found nothing after it should have respawned
+
+
+class _Grid:
+    # nodes bucketed by (x // size, y // size)
+    def __init__(self, size: int):
+        self.size = size
+        self.cells: Dict[Cell, List[Node]] = {}
+        self.cell_of: Dict[Node, Cell] = {}
+        self.min_cell: Optional[Cell] = None
+        self.max_cell: Optional[Cell] = None
+
+    def __len__(self):
+        return len(self.cell_of)
+
+    def __contains__(self, n: Node):
+        return n in self.cell_of
+
+    def key(self, x: int, y: int) -> Cell:
+        return x // self.size, y // self.size
+
+    def add(self, n: Node):
+        k = self.key(n.x, n.y)
+        self.cells.setdefault(k, []).append(n)
+        self.cell_of[n] = k
+        # bounds only grow; they just cap how far a nearest search has to ring out
+        if self.min_cell is None:
+            self.min_cell = self.max_cell = k
+        else:
+            self.min_cell = (min(self.min_cell[0], k[0]), min(self.min_cell[1], k[1]))
+            self.max_cell = (max(self.max_cell[0], k[0]), max(self.max_cell[1], k[1]))
+
+    def discard(self, n: Node):
+        k = self.cell_of.pop(n, None)
+        if k is None:
+            return
+        bucket = self.cells[k]
+        bucket.remove(n)
+        if not bucket:
+            del self.cells[k]
+
+    def nearest(self, x: int, y: int, max_d2: Optional[float] = None) -> Tuple[Optional[Node], float]:
+        best: Optional[Node] = None
+        best_d2 = float("inf") if max_d2 is None else max_d2 + 1
+        if not self.cell_of:
+            return None, best_d2
+        cx, cy = self.key(x, y)
+        reach = max(abs(cx - self.min_cell[0]), abs(cx - self.max_cell[0]),
+                    abs(cy - self.min_cell[1]), abs(cy - self.max_cell[1]))
+        r = 0
+        while r <= reach:
+            # once the ring would visit more cells than there are, a plain scan is cheaper
+            if 8 * r > len(self.cells):
+                return self._scan(x, y, best, best_d2)
+            for k in self._ring(cx, cy, r):
+                for n in self.cells.get(k, ()):
+                    d2 = (n.x - x) ** 2 + (n.y - y) ** 2
+                    if d2 < best_d2:
+                        best, best_d2 = n, d2
+            # anything in ring r+1 is at least r * size away
+            if best is not None and best_d2 <= (r * self.size) ** 2:
+                break
+            if max_d2 is not None and (r * self.size) ** 2 > max_d2:
+                break
+            r += 1
+        return best, best_d2
+
+    def _scan(self, x: int, y: int, best: Optional[Node], best_d2: float) -> Tuple[Optional[Node], float]:
+        for bucket in self.cells.values():
+            for n in bucket:
+                d2 = (n.x - x) ** 2 + (n.y - y) ** 2
+                if d2 < best_d2:
+                    best, best_d2 = n, d2
+        return best, best_d2
+
+    @staticmethod
+    def _ring(cx: int, cy: int, r: int):
+        if r == 0:
+            yield cx, cy
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
 
 
 class WaypointDB:
-    def __init__(self):
-        self.nodes: List[Node] = []
+    # Every node sits in _all (merge lookups). Nodes whose respawn is due also sit in _ready
+    # (nearest-available lookups); the rest wait in _cooling, a heap ordered by the time they become ready.
+    # Respawn times are learned from visits, per node and for the whole resource (see RespawnBounds);
+    # revisit_sec is the prior until something is known.
+    def __init__(self, revisit_sec: float = NODE_MIN_REVISIT_SEC, learn: bool = RESPAWN_LEARNING_ENABLED):
+        self.revisit_sec = revisit_sec
+        self.learn = learn
+        self.resource = RespawnBounds()
+        self._all = _Grid(NODE_MERGE_RADIUS_PX)
+        self._ready = _Grid(NODE_MERGE_RADIUS_PX)
+        self._cooling: List[Tuple[float, int, Node]] = []
+        self._seq = 0
+        # nodes the worker is heading to; they stay known but are not offered again until observed
+        self._taken: Set[Node] = set()
+        # WaypointStore journaling every change, if the map is persisted
+        self.store = None
+
+    @property
+    def nodes(self) -> List[Node]:
+        return list(self._all.cell_of)
+
+    def __len__(self):
+        return len(self._all)
+
+    def __contains__(self, n: Node):
+        return n in self._all
+
+    def respawn_bounds(self, n: Node) -> RespawnBounds:
+        # the resource-wide bracket sharpens a node's own one, unless nodes disagree (respawn varies per node)
+        if self.resource.consistent():
+            b = n.respawn.narrowed(self.resource)
+            if b.consistent():
+                return b
+        return n.respawn
+
+    def respawn_sec(self, n: Node) -> float:
+        if not self.learn:
+            return self.revisit_sec
+        return self.respawn_bounds(n).estimate(self.revisit_sec)
+
+    def ready_at(self, n: Node) -> float:
+        return n.last_collected + self.respawn_sec(n)
+
+    def upcoming(self, until: float) -> List[Node]:
+        # nodes that are ready now or will be by `until`
+        self._promote(clock.now())
+        found = list(self._ready.cell_of)
+        seen = set(found)
+        for ready, _, n in self._cooling:
+            if ready <= until and n not in seen and self._current(ready, n):
+                found.append(n)
+                seen.add(n)
+        return found
 
     @staticmethod
     def _dist2(a: Tuple[int, int], b: Tuple[int, int]) -> int:
@@ -25,45 +169,170 @@ class WaypointDB:
         dy = a[1] - b[1]
         return dx * dx + dy * dy
 
-    def add_or_update(self, x: int, y: int, t: Optional[float] = None):
+    def _current(self, ready: float, n: Node) -> bool:
+        # heap entries go stale when a node is gathered, taken, removed or its estimate moves
+        return n in self._all and n not in self._taken and ready == self.ready_at(n)
+
+    def _cool(self, n: Node):
+        self._ready.discard(n)
+        self._seq += 1
+        heapq.heappush(self._cooling, (self.ready_at(n), self._seq, n))
+
+    def _rekey(self):
+        # the resource bracket moved, so every node's ready time may have too
+        self._ready = _Grid(NODE_MERGE_RADIUS_PX)
+        self._cooling = []
+        for n in self._all.cell_of:
+            if n not in self._taken:
+                self._cool(n)
+
+    def _promote(self, now: float):
+        # move nodes whose cooldown is over into the ready index; stale heap entries are dropped here
+        while self._cooling and self._cooling[0][0] <= now:
+            ready, _, n = heapq.heappop(self._cooling)
+            if self._current(ready, n) and n not in self._ready:
+                self._ready.add(n)
+
+    def _learn(self, n: Node, present: bool, gap: float) -> bool:
+        # returns True when the resource-wide bracket moved
+        n.visits += 1
+        n.respawn.observe(present, gap)
+        return self.resource.observe(present, gap)
+
+    def add_or_update(self, x: int, y: int, t: Optional[float] = None) -> Node:
         if t is None:
-            t = time.time()
-        pos = (x, y)
+            t = clock.now()
         r2 = NODE_MERGE_RADIUS_PX * NODE_MERGE_RADIUS_PX
-        best_i = -1
-        best_d2 = 10 ** 12
-        for i, n in enumerate(self.nodes):
-            d2 = self._dist2((n.x, n.y), pos)
-            if d2 < best_d2:
-                best_d2 = d2
-                best_i = i
-        if best_i >= 0 and best_d2 <= r2:
-            n = self.nodes[best_i]
+        n, _ = self._all.nearest(x, y, r2)
+        rekey = False
+        if n is not None:
+            self._all.discard(n)
+            self._taken.discard(n)
             n.x = int((n.x + x) / 2)
             n.y = int((n.y + y) / 2)
+            # gathered again: it respawned within the gap (closer gathers are one multi-gather harvest)
+            if n.last_collected and t - n.last_collected >= RESPAWN_MIN_SEC:
+                rekey = self._learn(n, True, t - n.last_collected)
+                n.misses = 0
             n.last_collected = t
         else:
-            self.nodes.append(Node(x=x, y=y, last_collected=t))
+            n = Node(x=x, y=y, last_collected=t)
+        self._all.add(n)
+        if rekey and self.learn:
+            self._rekey()
+        else:
+            self._cool(n)
+        if self.store is not None:
+            self.store.updated(x, y, t)
+        return n
 
-    def next_available(self, curx: int, cury: int, *, remove: bool = True) -> Optional[Node]:
-        now = time.time()
-        best: Optional[Node] = None
-        best_d2: float = float("inf")
+    def add_seen(self, x: int, y: int) -> Node:
+        # a node spotted by a scan: ready now, unless it is one we already know
+        n, _ = self._all.nearest(x, y, NODE_MERGE_RADIUS_PX * NODE_MERGE_RADIUS_PX)
+        if n is not None:
+            return n
+        n = Node(x=x, y=y, last_collected=0.0)
+        self._all.add(n)
+        self._cool(n)
+        if self.store is not None:
+            self.store.seen(x, y)
+        return n
 
-        for n in self.nodes:
-            if now - n.last_collected < NODE_MIN_REVISIT_SEC:
-                continue
-            d2 = (n.x - curx) ** 2 + (n.y - cury) ** 2
-            if d2 < best_d2:
-                best, best_d2 = n, d2
+    def insert(self, x: int, y: int, t: float, lo: float = 0.0, hi: Optional[float] = None,
+               visits: int = 0, misses: int = 0) -> Node:
+        # adds a node as is, without merging it into a neighbour (loading a saved map)
+        n = Node(x=x, y=y, last_collected=t, respawn=RespawnBounds(lo, hi), visits=visits, misses=misses)
+        self._all.add(n)
+        moved = self.resource.observe(False, lo)
+        if hi is not None:
+            moved = self.resource.observe(True, hi) or moved
+        if moved and self.learn:
+            self._rekey()
+        else:
+            self._cool(n)
+        return n
 
-        if best is None:
-            return None
+    def node_at(self, x: int, y: int) -> Optional[Node]:
+        n, _ = self._all.nearest(x, y, 0)
+        return n
 
-        if remove:
-            try:
-                self.nodes.remove(best)
-            except ValueError:
-                pass
+    def take(self, n: Node):
+        # the worker is heading to n; it comes back through add_or_update once gathered, or observe
+        if n not in self._all:
+            return
+        self._ready.discard(n)
+        self._taken.add(n)
 
+    def release(self, n: Node):
+        # the visit told nothing about n (the worker didn't get to gather): back to the queue, no learning
+        if n not in self._taken:
+            return
+        self._taken.discard(n)
+        self._cool(n)
+
+    def observe(self, n: Node, present: bool, t: Optional[float] = None):
+        # outcome of a visit to n: gathered (present) or nothing there
+        if n not in self._all:
+            return
+        if t is None:
+            t = clock.now()
+        self._taken.discard(n)
+        gap = t - n.last_collected
+        rekey = False
+        if present:
+            if n.last_collected and gap >= RESPAWN_MIN_SEC:
+                rekey = self._learn(n, True, gap)
+            n.misses = 0
+            n.last_collected = t
+        else:
+            # empty before the known bound is just the probing; empty after it means the node may be gone
+            hi = self.respawn_bounds(n).hi
+            if not self.learn or gap >= (RESPAWN_MAX_SEC if hi is None else hi):
+                n.visits += 1
+                n.misses += 1
+            else:
+                rekey = self._learn(n, False, gap)
+        if self.store is not None:
+            self.store.observed(n, present, t)
+        if n.misses >= RESPAWN_MAX_MISSES:
+            self.remove(n)
+        if rekey and self.learn:
+            self._rekey()
+        elif n in self._all:
+            self._cool(n)
+
+    def remove(self, n: Node):
+        if n not in self._all:
+            return
+        if self.store is not None:
+            self.store.removed(n)
+        self._all.discard(n)
+        self._ready.discard(n)
+        self._taken.discard(n)
+
+    def next_available(self, curx: int, cury: int, *, remove: bool = True) -> Optional[Node]:
+        self._promote(clock.now())
+        best, _ = self._ready.nearest(curx, cury)
+        if best is not None and remove:
+            self.take(best)
         return best
+
+    def _ready_in(self, n: Node, now: float) -> Optional[float]:
+        # seconds until the node is due again, 0 if it is; None when it was only seen, never gathered
+        if not n.last_collected:
+            return None
+        return round(max(0.0, self.ready_at(n) - now), 1)
+
+    def respawn_stats(self) -> dict:
+        nodes = self.nodes
+        now = clock.now()
+        shared = self.learn and self.resource.known() and self.resource.consistent()
+        res = self.resource.as_dict(self.revisit_sec)
+        res.update(observations=sum(n.visits for n in nodes), shared=shared, learning=self.learn)
+        return {
+            "resource": res,
+            "nodes": [dict(x=n.x, y=n.y, visits=n.visits, misses=n.misses,
+                           **self.respawn_bounds(n).as_dict(self.revisit_sec),
+                           ready_in_sec=self._ready_in(n, now))
+                      for n in nodes],
+        }
@@ -1,91 +1,239 @@
 # autogather/worker.py
+import json
+import logging
+import os
 import threading
 import time
+from typing import Optional
 
-import cv2
-
+from autogather import clock, metrics
 from autogather.config import (
-    SCALES, MATCH_THRESHOLD,
+    SCALES,
     ACTION_COOLDOWN, ALIGN_TOLERANCE,
     SCROLL_UNIT, MAX_SCROLL_STEPS,
-    RESOURCE_THRESHOLD
+    RESOURCE_THRESHOLD, METRICS_DUMP_DIR, EVENT_WAITS_ENABLED, WAIT_POLL_SEC, ROUTE_PLANNER_ENABLED,
+    MULTI_TARGET_ENABLED, TRACKING_ENABLED, ODOMETRY_ENABLED
 )
 from autogather.enums.aspect_ratio import AspectRatio
 from autogather.enums.gathering_speed import GatheringSpeedLevel
 from autogather.input_sim import press_key, scroll_once, _hide_unhide_ui
+from autogather.model.calibration import MoveCalibration
+from autogather.model.match_executor import shared_executor
 from autogather.model.navigator import Navigator, run
+from autogather.model.odometry import VisualOdometry
+from autogather.model.prompt_detector import PromptDetector, PromptHits, NO_PROMPT
 from autogather.model.resource_model import ResourceObject
+from autogather.model.route_planner import RoutePlanner
 from autogather.model.templates import TemplateSet
+from autogather.model.tracker import ResourceTracker
+from autogather.model.waypoint_store import open_route
 from autogather.model.waypoints import WaypointDB
 from autogather.screen import _get_selector_rectangle
 
+logger = logging.getLogger(__name__)
+
 
 class Worker(threading.Thread):
     def __init__(self, screen, ts_focus: TemplateSet, ts_gath: TemplateSet,
                  ts_sel: TemplateSet, ts_res: TemplateSet, want_gathering: bool, ratio: AspectRatio,
-                 gathering_speed: GatheringSpeedLevel, resource: ResourceObject, move_to_start: bool, dont_move: bool):
+                 gathering_speed: GatheringSpeedLevel, resource: ResourceObject, move_to_start: bool, dont_move: bool,
+                 route: Optional[str] = None, calibration: Optional[MoveCalibration] = None):
         super().__init__(daemon=True)
         self.screen = screen
         self.ts_focus = ts_focus
         self.ts_gath = ts_gath
         self.ts_sel = ts_sel
         self.ts_resource = ts_res
+        self.matcher = shared_executor()
+        self.prompts = PromptDetector(ts_focus, ts_gath, ts_sel, self.matcher)
         self.want_gathering = want_gathering
         self._stop = threading.Event()
         self.state = "idle"
         self._last_action = 0.0
+        # time of the last key/scroll we sent; frames for decisions must be newer than this
+        self._input_at = 0.0
         self.gathering_speed = gathering_speed
         self.move_to_start = move_to_start
         self.dont_move = dont_move
+        self.metrics_dir = METRICS_DUMP_DIR
+        # seconds the event waits cut from the fixed timeouts, this cycle and overall
+        self._saved = 0.0
+        self.saved_total = 0.0
+        self.cycles = 0
+        self.scan_stats = {"scans": 0, "detections": 0}
 
         self.waypoints = WaypointDB()
-        self.nav = Navigator(resource)
+        # positions are relative to where the run started, so a saved map belongs to a resource and a start spot
+        self.map_store = open_route(resource.folder, route, self.waypoints)
+        self.nav = Navigator(resource, calibration)
+        self.odometry = VisualOdometry(self.nav) if ODOMETRY_ENABLED else None
+        # full frame the resource scan used this cycle, reused as the odometry "before" frame
+        self._frame = None
+        self.tracker = ResourceTracker(ts_res, self.nav) if TRACKING_ENABLED and ts_res else None
+        # a gather costs the F press settle plus the mining time
+        self.planner = RoutePlanner(self.waypoints, self.nav, 1 + self._gathering_seconds()) \
+            if ROUTE_PLANNER_ENABLED else None
 
         self.ratio = ratio
         self.res = resource
         self.align_failed =False
+        # set by press_f_key: the last check_f_and_perform actually gathered
+        self.gathered = False
 
     # ---- main loop ----
     def run(self):
+        metrics.registry().reset()
         while not self._stop.is_set():
-            if self.check_f_and_perform():
-                continue
-            if self.dont_move:
-                time.sleep(3)
-                continue
-            if self.move_to_start:
-                self._move_to_start()
-            # 0) If waypoint exists, move to it:
+            self._saved = 0.0
+            with metrics.span("cycle"):
+                self._cycle()
+            metrics.observe("saved.cycle", self._saved)
+            self.saved_total += self._saved
+            self.cycles += 1
+        logger.info(f"Template match stats for {self.res.folder}: {self.match_stats()}")
+        if self.cycles:
+            logger.info(f"Event waits saved {self.saved_total:.1f}s over {self.cycles} cycles "
+                        f"({self.saved_total / self.cycles:.2f}s per cycle)")
+        if self.odometry and self.odometry.stats["moves"]:
+            o = self.odometry.stats
+            logger.info(f"Odometry corrected {o['drift_px']:.0f}px of drift over {o['corrected']}/{o['moves']} moves")
+        logger.info(f"Respawn estimate for {self.res.folder}: {self.waypoints.respawn_stats()['resource']}")
+        self._dump_metrics()
+        if self.map_store:
+            self.map_store.close()
+
+    def _cycle(self):
+        self._frame = None
+        if self.check_f_and_perform():
+            return
+        if self.dont_move:
+            self._wait_until(self._prompt_visible, 3, "idle")
+            return
+        if self.move_to_start:
+            self._move_to_start()
+        # 0) If waypoint exists, move to it:
+        if self.planner:
+            wp = self.planner.next(self.nav.pos_x, self.nav.pos_y)
+        else:
             wp = self.waypoints.next_available(self.nav.pos_x, self.nav.pos_y)
-            if wp is not None:
-                self.state = f"to waypoint → ({wp.x},{wp.y})"
-                self.nav.approach_by_distance(wp.x - self.nav.pos_x, wp.y - self.nav.pos_y)
-
-                time.sleep(1)
-                self.check_f_and_perform()
-                continue
-            # 1) Measure resource offset:
-            hit_obj, dx, dy = self._measure_resource_offset()
-            if hit_obj:
-                self.nav.approach_by_distance(dx, dy, False)
-                self.check_f_and_perform()
-                time.sleep(1)
+        if wp is not None:
+            self._visit(wp)
+            return
+        # 1) Measure resource offset:
+        hit_obj, dx, dy = self._measure_resource_offset()
+        if hit_obj:
+            self._approach(dx, dy, False)
+            self.check_f_and_perform()
+            self._wait_until(self._prompt_visible, 1, "settle")
+
+    def _visit(self, wp):
+        self.state = f"to waypoint → ({wp.x},{wp.y})"
+        self._approach(wp.x - self.nav.pos_x, wp.y - self.nav.pos_y)
+
+        self._wait_until(self._prompt_visible, 1, "settle")
+        # gathered or found empty, the visit is a respawn observation for this node. A prompt left
+        # alone (cooldown, align failed) says nothing about the respawn, so the node just goes back.
+        if self.check_f_and_perform() and not self.gathered:
+            self.waypoints.release(wp)
+        else:
+            self.waypoints.observe(wp, self.gathered)
 
     def _move_to_start(self):
         is_on_start = self.nav.is_start_position()
-        self.nav.approach_by_distance(self.nav.pos_x * -1, 0)
-        self.nav.approach_by_distance(0, self.nav.pos_y * -1)
+        self._approach(self.nav.pos_x * -1, 0)
+        self._approach(0, self.nav.pos_y * -1)
         self.check_f_and_perform()
         if self.res.is_adjust_every_cycle() and not is_on_start:
             adjust_dir = self.res.get_adjust_dir()
             run(adjust_dir.is_x(), adjust_dir.get_step())
+            self._mark_input()
 
     # ---- helpers ----
     def stop(self):
         self._stop.set()
 
+    def _sleep(self, sec: float, stage: str):
+        # returns early on stop, so Stop doesn't wait out a long timeout
+        with metrics.span(f"sleep.{stage}"):
+            clock.wait(self._stop, sec)
+
+    def _wait_until(self, predicate, timeout: float, stage: str) -> bool:
+        # polls predicate every WAIT_POLL_SEC and returns as soon as it holds;
+        # timeout is the fixed sleep this replaces
+        if not EVENT_WAITS_ENABLED:
+            self._sleep(timeout, stage)
+            return False
+        end = clock.now() + timeout
+        slept = 0.0
+        met = False
+        while not self._stop.is_set():
+            if predicate():
+                met = True
+                break
+            left = end - clock.now()
+            if left <= 0:
+                break
+            step = min(WAIT_POLL_SEC, left)
+            clock.wait(self._stop, step)
+            slept += step
+        saved = max(0.0, end - clock.now())
+        metrics.observe(f"sleep.{stage}", slept)
+        metrics.observe(f"saved.{stage}", saved)
+        self._saved += saved
+        return met
+
+    def _prompt_visible(self) -> bool:
+        return self._has_any_prompt().any_prompt
+
+    def _dump_metrics(self):
+        if not self.metrics_dir:
+            return
+        base = os.path.join(self.metrics_dir, f"{self.res.folder}-{time.strftime('%Y%m%d-%H%M%S')}")
+        try:
+            metrics.registry().dump(base)
+            logger.info(f"Stage timings saved to {base}.json/.csv")
+            with open(f"{base}-respawn.json", "w", encoding="utf-8") as f:
+                json.dump(self.waypoints.respawn_stats(), f, indent=2)
+        except OSError as e:
+            logger.warning(f"Could not save stage timings: {e}")
+
+    def _approach(self, dx: int, dy: int, tolerated: bool = True):
+        # a Navigator move, checked against the view before and after it when odometry is on
+        before = self._frame
+        if self.odometry and before is None:
+            # a copy: the after frame below is grabbed into the same buffer
+            gray = self.screen.grab_gray(self._input_at)
+            before = None if gray is None else gray.copy()
+        start = (self.nav.pos_x, self.nav.pos_y)
+        self.nav.approach_by_distance(dx, dy, tolerated)
+        self._mark_input()
+        self._frame = None
+        commanded = (self.nav.pos_x - start[0], self.nav.pos_y - start[1])
+        if self.odometry and commanded != (0, 0):
+            with metrics.span("odometry"):
+                self.odometry.update(before, self.screen.grab_gray(self._input_at), commanded)
+
+    def _mark_input(self):
+        self._input_at = clock.now()
+
+    def match_stats(self) -> dict:
+        sets = (("focused", self.ts_focus), ("gathering", self.ts_gath),
+                ("selector", self.ts_sel), ("resource", self.ts_resource))
+        stats = {name: dict(ts.stats) for name, ts in sets if ts is not None}
+        stats["prompt"] = dict(self.prompts.stats, reuse_rate=round(self.prompts.hit_rate(), 3))
+        stats["scan"] = dict(self.scan_stats)
+        compaction = self.ts_resource.compaction if self.ts_resource else None
+        if compaction:
+            stats["compaction"] = {"templates": len(compaction.matrix), "kept": len(compaction.clusters),
+                                   "pairs_saved_per_scan": compaction.saved(SCALES)}
+        if self.tracker:
+            stats["tracker"] = dict(self.tracker.stats)
+        if self.odometry:
+            stats["odometry"] = dict(self.odometry.stats, drift_px=round(self.odometry.stats["drift_px"], 1))
+        return stats
+
     def cooldown_ok(self):
-        return (time.time() - self._last_action) > ACTION_COOLDOWN
+        return (clock.now() - self._last_action) > ACTION_COOLDOWN
 
     @staticmethod
     def _y_center(box):
@@ -106,15 +254,20 @@ class Worker(threading.Thread):
 
         return dg + ALIGN_TOLERANCE < df
 
-    def hold_after_press(self):
-        self._last_action = time.time()
+    def hold_after_press(self, prompt_gone: bool):
+        # gathering is over once the prompt is back after having gone away (node not depleted);
+        # without that signal the speed level's duration is waited out
+        self._last_action = clock.now()
         end = self._last_action + self._gathering_seconds()
-        while not self._stop.is_set():
-            left = end - time.time()
-            if left <= 0:
-                break
-            self.state = f"mining… {left:.1f}s"
-            time.sleep(min(0.2, left))
+
+        def finished():
+            nonlocal prompt_gone
+            self.state = f"mining… {max(0.0, end - clock.now()):.1f}s"
+            visible = self._prompt_visible()
+            prompt_gone = prompt_gone or not visible
+            return visible and prompt_gone
+
+        self._wait_until(finished, self._gathering_seconds(), "gathering")
 
     def _gathering_seconds(self):
         if self.gathering_speed == GatheringSpeedLevel.SLOW:
@@ -126,42 +279,79 @@ class Worker(threading.Thread):
 
     def press_f_key(self):
         self.state = "press F"
-        press_key('f')
-        time.sleep(1)
-        self.hold_after_press()
+        with metrics.span("input.key"):
+            press_key('f')
+        self._mark_input()
+        gone = self._wait_until(lambda: not self._prompt_visible(), 1, "press")
+        self.hold_after_press(gone)
+        self.gathered = True
         self.waypoints.add_or_update(self.nav.pos_x, self.nav.pos_y)
 
     def _measure_resource_offset(self):
         if not self.ts_resource:
             return False, 0, 0
-        frame = self.screen.grab_bgr()
-        if frame is None:
+        gray = self.screen.grab_gray(self._input_at)
+        if gray is None:
             return False, 0, 0
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        _hide_unhide_ui()
-        time.sleep(0.5)
-        hit = self.ts_resource.best_match(gray, SCALES, RESOURCE_THRESHOLD)
-        _hide_unhide_ui()
-        if not hit:
+        # the capture buffer is reused by the next grab, so the odometry keeps its own copy
+        self._frame = gray.copy() if self.odometry else None
+        with metrics.span("input.key"):
+            _hide_unhide_ui()
+        hidden_at = clock.now()
+        # the UI stays hidden for 0.5s; the match runs in that time instead of after it
+        hits = self._find_resources(gray)
+        rest = max(0.0, 0.5 - (clock.now() - hidden_at)) if EVENT_WAITS_ENABLED else 0.5
+        metrics.observe("saved.ui", 0.5 - rest)
+        self._saved += 0.5 - rest
+        self._sleep(rest, "ui")
+        with metrics.span("input.key"):
+            _hide_unhide_ui()
+        self._mark_input()
+        if not hits:
             return False, 0, 0
-        (x1, y1), (x2, y2) = hit["box"]
-        cx = (x1 + x2) // 2
-        cy = (y1 + y2) // 2
         H, W = gray.shape[:2]
-        dx = cx - W // 2
-        dy = cy - H // 2
+        offsets = []
+        for hit in hits:
+            (x1, y1), (x2, y2) = hit["box"]
+            offsets.append(((x1 + x2) // 2 - W // 2, (y1 + y2) // 2 - H // 2))
+        # walk to the closest one; the rest become waypoints the planner visits next
+        i = min(range(len(hits)), key=lambda k: self.nav.travel_ms(*offsets[k])[0])
+        for k, (ox, oy) in enumerate(offsets):
+            if k != i:
+                self.waypoints.add_seen(*self.nav.landing(ox, oy, False))
+        if self.tracker:
+            self.tracker.lock(hits[i], gray.shape)
+        dx, dy = offsets[i]
         return True, dx, dy
 
+    def _find_resources(self, gray):
+        # the tracked resource if it is still where the moves since predict; otherwise a full scan
+        if self.tracker and self.tracker.locked:
+            with metrics.span("match.track"):
+                hit = self.tracker.track(gray)
+            if hit:
+                return [hit]
+        self.scan_stats["scans"] += 1
+        if MULTI_TARGET_ENABLED:
+            hits = self.matcher.find_all(gray, self.ts_resource, SCALES, RESOURCE_THRESHOLD)
+        else:
+            hit = self.matcher.best_match(gray, self.ts_resource, SCALES, RESOURCE_THRESHOLD)
+            hits = [hit] if hit else []
+        self.scan_stats["detections"] += len(hits)
+        return hits
+
     def check_f_and_perform(self) -> bool:
-        any_prompt = self._has_any_prompt()
-        if any_prompt[0]:
-            return self._handle_prompt(any_prompt[1], any_prompt[2], any_prompt[3])
-        return any_prompt[0]
+        # True when a prompt was handled; self.gathered tells whether F was pressed for it
+        self.gathered = False
+        hits = self._has_any_prompt()
+        if hits.any_prompt:
+            return self._handle_prompt(hits.focus, hits.gathering, hits.selector)
+        return False
 
     def _handle_prompt(self, hit_f, hit_g, hit_s) -> bool:
         if not self.cooldown_ok():
             self.state = "cooldown"
-            time.sleep(0.05)
+            self._sleep(0.05, "cooldown")
             return True
 
         hit_button_f = (hit_g and hit_s and self._selector_on_gathering(hit_f, hit_g,
@@ -175,14 +365,15 @@ class Worker(threading.Thread):
         aligned = hit_g and hit_s and self._selector_on_gathering(hit_f, hit_g, hit_s)
         while not aligned and steps < MAX_SCROLL_STEPS and not self._stop.is_set():
             self.state = f"scroll align {steps + 1}/{MAX_SCROLL_STEPS}"
-            scroll_once(SCROLL_UNIT)
-            roi, _ = _get_selector_rectangle(self.screen, self.ratio)
-            if roi is None:
-                break
-            hit_f = self.get_ts_best_match(roi, self.ts_focus)
-            hit_g = self.get_ts_best_match(roi, self.ts_gath)
-            hit_s = self.get_ts_best_match(roi, self.ts_sel)
-            aligned = hit_g and hit_s and self._selector_on_gathering(hit_f, hit_g, hit_s)
+            with metrics.span("align.step"):
+                with metrics.span("input.scroll"):
+                    scroll_once(SCROLL_UNIT)
+                self._mark_input()
+                roi, _ = _get_selector_rectangle(self.screen, self.ratio, newer_than=self._input_at)
+                if roi is None:
+                    break
+                hit_f, hit_g, hit_s = self.prompts.detect(roi, self.screen.version)
+                aligned = hit_g and hit_s and self._selector_on_gathering(hit_f, hit_g, hit_s)
             steps += 1
 
         if aligned:
@@ -192,20 +383,11 @@ class Worker(threading.Thread):
         else:
             self.align_failed = True
             self.state = "align failed"
-            time.sleep(0.2)
+            self._sleep(0.2, "align_failed")
             return True
 
-    def get_ts_best_match(self, roi, template_set: TemplateSet):
-        if roi is None or template_set is None:
-            return None
-        return template_set.best_match(roi, SCALES, MATCH_THRESHOLD)
-
-    def _has_any_prompt(self):
-        roi, _ = _get_selector_rectangle(self.screen, self.ratio)
+    def _has_any_prompt(self) -> PromptHits:
+        roi, _ = _get_selector_rectangle(self.screen, self.ratio, newer_than=self._input_at)
         if roi is None:
-            return False
-        hit_f = self.get_ts_best_match(roi, self.ts_focus)
-        hit_g = self.get_ts_best_match(roi, self.ts_gath)
-        hit_s = self.get_ts_best_match(roi, self.ts_sel)
-        any_prompt = (hit_f or hit_g) and hit_s
-        return [any_prompt, hit_f, hit_g, hit_s]
+            return NO_PROMPT
+        return self.prompts.detect(roi, self.screen.version)
@@ -0,0 +1,218 @@
+import argparse
+import json
+import logging
+import os
+import time
+from collections import Counter
+from typing import Optional
+
+import cv2
+
+from autogather import clock, input_sim, metrics
+from autogather.config import IMG_EXTS, PROMPT_ROI
+from autogather.enums.aspect_ratio import AspectRatio
+from autogather.enums.gathering_speed import GatheringSpeedLevel
+from autogather.folder_utils import FOLDER_TO_RESOURCE, load_resource_dir
+from autogather.model.resource_model import ResourceObject
+from autogather.model.worker import Worker
+from autogather.screen import selector_roi_rect
+
+logger = logging.getLogger(__name__)
+
+
+class FileScreen:
+    # Plays recorded frames (a folder of images or a video file) at `fps` against autogather.clock,
+    # with the same grab_* calls as WindowScreen.
+    def __init__(self, source: str, fps: float, on_exhausted=None):
+        self.fps = fps
+        self.on_exhausted = on_exhausted
+        self.exhausted = False
+        self.started_at: Optional[float] = None
+        self._paths = None
+        self._video = None
+        if os.path.isdir(source):
+            self._paths = sorted(os.path.join(source, n) for n in os.listdir(source) if n.lower().endswith(IMG_EXTS))
+            if not self._paths:
+                raise FileNotFoundError(f"No frames in {source}")
+        else:
+            self._video = cv2.VideoCapture(source)
+            if not self._video.isOpened():
+                raise FileNotFoundError(f"Cannot open video: {source}")
+        self.index = -1
+        self.version = 0  # bumps when the frame size changes, like WindowGeometry.version
+        self._bgr = None
+        self._gray = None
+        self._load(0)
+
+    def _load(self, idx: int) -> bool:
+        if self._paths is not None:
+            if idx >= len(self._paths):
+                return False
+            frame = cv2.imread(self._paths[idx], cv2.IMREAD_COLOR)
+            if frame is None:
+                return False
+        else:
+            frame = None
+            while self.index < idx:
+                ok, frame = self._video.read()
+                if not ok:
+                    return False
+                self.index += 1
+        self.index = idx
+        if self._bgr is None or self._bgr.shape != frame.shape:
+            self.version += 1
+        self._bgr = frame
+        self._gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return True
+
+    def _advance(self) -> bool:
+        if self.exhausted:
+            return False
+        if self.started_at is None:
+            self.started_at = clock.now()
+        idx = int((clock.now() - self.started_at) * self.fps)
+        if idx != self.index and not self._load(idx):
+            self.exhausted = True
+            if self.on_exhausted:
+                self.on_exhausted()
+            return False
+        return True
+
+    def grab_bgr(self):
+        return self._bgr if self._advance() else None
+
+    def grab_gray(self, newer_than: float = None):
+        return self._gray if self._advance() else None
+
+    def grab_gray_region(self, rect, newer_than: float = None):
+        if not self._advance():
+            return None
+        x1, y1, x2, y2 = rect
+        return self._gray[y1:y2, x1:x2]
+
+    def dims(self):
+        h, w = self._gray.shape[:2]
+        return w, h
+
+    def roi_rect(self, ratio: AspectRatio, roi_promt=PROMPT_ROI):
+        W, H = self.dims()
+        return selector_roi_rect(W, H, ratio, roi_promt)
+
+
+class RecordingInput:
+    # input_sim sink: logs what the bot would have sent, stamped with autogather.clock
+    def __init__(self):
+        self.events = []
+
+    def _log(self, kind: str, value):
+        self.events.append((clock.now(), kind, value))
+
+    def press(self, key: str):
+        self._log("press", key)
+
+    def key_down(self, key: str):
+        self._log("down", key)
+
+    def key_up(self, key: str):
+        self._log("up", key)
+
+    def scroll(self, unit: int):
+        self._log("scroll", unit)
+
+    def move(self, x: int, y: int, relative: bool):
+        self._log("move_rel" if relative else "move", (x, y))
+
+    def summary(self) -> dict:
+        counts = Counter(f"{kind}:{value}" for _, kind, value in self.events if kind in ("press", "scroll"))
+        held = Counter()
+        down_at = {}
+        for t, kind, value in self.events:
+            if kind == "down":
+                down_at[value] = t
+            elif kind == "up" and value in down_at:
+                held[value] += t - down_at.pop(value)
+        return {
+            "events": len(self.events),
+            "counts": dict(counts),
+            "held_sec": {k: round(v, 3) for k, v in held.items()},
+        }
+
+
+def replay(source: str, resource: ResourceObject, ratio: AspectRatio, fps: float,
+           speed: GatheringSpeedLevel = GatheringSpeedLevel.FAST, want_gathering: bool = True,
+           move_to_start: bool = False, dont_move: bool = False) -> dict:
+    res_enum = FOLDER_TO_RESOURCE[resource.folder]
+    ts_f, ts_g, ts_s, ts_r = load_resource_dir(res_enum.folder_name, res_enum)
+    ff = clock.FastForwardClock()
+    rec = RecordingInput()
+    clock.install(ff)
+    input_sim.set_sink(rec)
+    try:
+        screen = FileScreen(source, fps)
+        worker = Worker(screen, ts_f, ts_g, ts_s, ts_r, want_gathering, ratio, speed, resource,
+                        move_to_start, dont_move)
+        screen.on_exhausted = worker.stop
+        worker.metrics_dir = None
+        wall_start = time.perf_counter()
+        virtual_start = clock.now()
+        worker.run()
+        wall = time.perf_counter() - wall_start
+        virtual = clock.now() - virtual_start
+        timings = metrics.registry().report()
+        respawn = worker.waypoints.respawn_stats()
+    finally:
+        input_sim.set_sink(None)
+        clock.install(clock.RealClock())
+
+    checks = worker.prompts.stats["checks"]
+    return {
+        "source": source,
+        "resource": resource.folder,
+        "frames": screen.index + 1,
+        "wall_sec": round(wall, 3),
+        "virtual_sec": round(virtual, 3),
+        "speedup": round(virtual / wall, 2) if wall > 0 else None,
+        "gathers": rec.summary()["counts"].get("press:f", 0),
+        "prompt_checks": checks,
+        "decisions_per_wall_sec": round(checks / wall, 2) if wall > 0 else None,
+        "input": rec.summary(),
+        "match_stats": worker.match_stats(),
+        "timings": timings,
+        "respawn": respawn,
+        "events": [[round(t - virtual_start, 3), kind, value] for t, kind, value in rec.events],
+    }
+
+
+def main(argv=None):
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    )
+    parser = argparse.ArgumentParser(prog="python -m autogather.replay",
+                                     description="Run the Worker loop against recorded frames, headless.")
+    parser.add_argument("source", help="folder of frames (played in name order) or a video file")
+    parser.add_argument("--resource", required=True, choices=sorted(FOLDER_TO_RESOURCE))
+    parser.add_argument("--ratio", default="16:9", choices=[str(r) for r in AspectRatio])
+    parser.add_argument("--fps", type=float, default=10.0, help="capture rate of the recording")
+    parser.add_argument("--speed", default=GatheringSpeedLevel.FAST.name, choices=[g.name for g in GatheringSpeedLevel])
+    parser.add_argument("--use-focus", action="store_true",
+                        help="gather with Focus; by default only 'Normal' is pressed, like the UI default")
+    parser.add_argument("--dont-move", action="store_true")
+    parser.add_argument("--move-back-to-start", action="store_true")
+    parser.add_argument("--out", help="write the full report, with every input event, as JSON")
+    args = parser.parse_args(argv)
+
+    res = FOLDER_TO_RESOURCE[args.resource]
+    resource = ResourceObject(res.folder_name, res.get_mult_x(), res.get_mult_y(), res.get_tol_x(),
+                              res.get_tol_y(), res.is_focus_needed)
+    report = replay(args.source, resource, AspectRatio.get_ratio(args.ratio), args.fps,
+                    GatheringSpeedLevel[args.speed], not args.use_focus, args.move_back_to_start, args.dont_move)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    report.pop("events")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,164 @@
 import threading
+import time
 
 import cv2
 import numpy as np
 from mss import mss
 
+from autogather import metrics
 from autogather.enums.aspect_ratio import AspectRatio
-from .config import PROMPT_ROI
-from .winutil import get_window_rect
+from .config import PROMPT_ROI, GEOMETRY_REFRESH_SEC
+
+
+def _window_rect(hwnd: int):
+    # winutil binds user32 at import time, so only pull it in when a real window is captured
+    from .winutil import get_window_rect
+    return get_window_rect(hwnd)
+
+
+def _bgra_view(img) -> np.ndarray:
+    return np.frombuffer(img.raw, dtype=np.uint8).reshape(img.height, img.width, 4)
+
+
+def _window_mon(r):
+    left, top, right, bottom = r
+    w, h = right - left, bottom - top
+    if w <= 1 or h <= 1:
+        return None
+    return {"left": left, "top": top, "width": w, "height": h}
+
+
+class WindowGeometry:
+    # window rect and ROI rectangles derived from it; version bumps whenever the rect changes,
+    # so anything cached from the window's pixel layout can key on it
+    def __init__(self, hwnd: int, rect_fn, refresh_sec: float = GEOMETRY_REFRESH_SEC):
+        self.hwnd = hwnd
+        self.refresh_sec = refresh_sec
+        self.version = 0
+        self._rect_fn = rect_fn
+        self._rect = None
+        self._checked_at = 0.0
+        self._rois = {}
+        self._lock = threading.Lock()
+
+    def rect(self):
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        # caller holds the lock
+        now = time.time()
+        if self._rect is None or now - self._checked_at >= self.refresh_sec:
+            r = tuple(self._rect_fn(self.hwnd))
+            self._checked_at = now
+            if r != self._rect:
+                self._rect = r
+                self._rois = {}
+                self.version += 1
+        return self._rect
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = 0.0
+
+    def dims(self):
+        left, top, right, bottom = self.rect()
+        return (right - left), (bottom - top)
+
+    def roi_rect(self, ratio: AspectRatio, roi_promt=PROMPT_ROI):
+        with self._lock:
+            left, top, right, bottom = self._refresh()
+            W, H = right - left, bottom - top
+            if W <= 1 or H <= 1:
+                return None
+            key = (self.version, ratio, tuple(roi_promt))
+            rect = self._rois.get(key)
+            if rect is None:
+                rect = selector_roi_rect(W, H, ratio, roi_promt)
+                self._rois[key] = rect
+            return rect
 
 
 class WindowScreen:
-    def __init__(self, hwnd: int):
+    def __init__(self, hwnd: int, sct_factory=mss, rect_fn=_window_rect):
         self.hwnd = int(hwnd)
         self._tls = threading.local()
+        self._sct_factory = sct_factory
+        self.geometry = WindowGeometry(self.hwnd, rect_fn)
 
     def _sct(self):
         if not hasattr(self._tls, "sct"):
-            self._tls.sct = mss()
+            self._tls.sct = self._sct_factory()
         return self._tls.sct
 
+    def _grab(self, mon_fn):
+        with metrics.span("capture"):
+            return self._grab_once(mon_fn)
+
+    def _grab_once(self, mon_fn):
+        # a failed grab usually means the window moved or resized: refresh the rect and retry once
+        mon = mon_fn(self.geometry.rect())
+        if mon is None:
+            return None
+        try:
+            return self._sct().grab(mon)
+        except Exception:
+            self.geometry.invalidate()
+            mon = mon_fn(self.geometry.rect())
+            if mon is None:
+                return None
+            return self._sct().grab(mon)
+
     def grab_bgr(self):
-        left, top, right, bottom = get_window_rect(self.hwnd)
-        w, h = right - left, bottom - top
-        if w <= 1 or h <= 1:
+        img = self._grab(_window_mon)
+        if img is None:
+            return None
+        return _bgra_view(img)[:, :, :3]
+
+    def grab_gray(self, newer_than: float = None):
+        # full window in grayscale. The array is a per-thread buffer that the next grab_gray on this
+        # thread overwrites: a caller that keeps the frame past its next grab must copy it.
+        # newer_than only matters for buffered sources, a synchronous grab is always newer.
+        img = self._grab(_window_mon)
+        if img is None:
+            return None
+        return self._to_gray(img, "full")
+
+    def _to_gray(self, img, slot: str):
+        # BGRA -> GRAY straight from the mss buffer into a per-thread array kept between grabs
+        bufs = getattr(self._tls, "gray", None)
+        if bufs is None:
+            bufs = self._tls.gray = {}
+        shape = (img.height, img.width)
+        buf = bufs.get(slot)
+        if buf is None or buf.shape != shape:
+            buf = bufs[slot] = np.empty(shape, dtype=np.uint8)
+        with metrics.span("grayscale"):
+            cv2.cvtColor(_bgra_view(img), cv2.COLOR_BGRA2GRAY, dst=buf)
+        return buf
+
+    def grab_gray_region(self, rect, newer_than: float = None):
+        # rect is (x1, y1, x2, y2) in window pixels, clamped to the window; only that part of the
+        # screen is captured. Same contract as grab_gray: the result is only valid until the next
+        # grab_gray_region on this thread, copy it to keep it.
+        W, H = self.dims()
+        x1, y1, x2, y2 = max(0, rect[0]), max(0, rect[1]), min(W, rect[2]), min(H, rect[3])
+        if x2 - x1 <= 1 or y2 - y1 <= 1:
             return None
-        mon = {"left": left, "top": top, "width": w, "height": h}
-        img = self._sct().grab(mon)
-        return np.array(img)[:, :, :3]
+        img = self._grab(lambda r: {"left": r[0] + x1, "top": r[1] + y1, "width": x2 - x1, "height": y2 - y1})
+        if img is None:
+            return None
+        return self._to_gray(img, "roi")
 
     def dims(self):
-        left, top, right, bottom = get_window_rect(self.hwnd)
-        return (right - left), (bottom - top)
+        return self.geometry.dims()
+
+    def roi_rect(self, ratio: AspectRatio, roi_promt=PROMPT_ROI):
+        return self.geometry.roi_rect(ratio, roi_promt)
+
+    @property
+    def version(self) -> int:
+        return self.geometry.version
 
 
 def aspect_ration_convert_from_16_9(roi: tuple[float, float, float, float], x_ratio: int, y_ratio: int) -> tuple[
@@ -57,16 +185,20 @@ def aspect_ration_convert_from_16_9(roi: tuple[float, float, float, float], x_ra
     return x1_new, y1_new, x2_new, y2_new
 
 
-def _get_selector_rectangle(screen: WindowScreen, ratio: AspectRatio, roi_promt = PROMPT_ROI):
-    frame = screen.grab_bgr()
-    if frame is None:
-        return None
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    H, W = gray.shape[:2]
+def selector_roi_rect(W: int, H: int, ratio: AspectRatio, roi_promt=PROMPT_ROI) -> tuple[int, int, int, int]:
     x1_k, y1_k, x2_k, y2_k = aspect_ration_convert_from_16_9((roi_promt[0], roi_promt[1], roi_promt[2], roi_promt[3]), ratio.x, ratio.y)
-    x1 = int(W * x1_k)
-    y1 = int(H * y1_k)
-    x2 = int(W *  x2_k)
-    y2 = int(H * y2_k)
-    roi = gray[y1:y2, x1:x2]
-    return roi, (x1, y1, x2, y2)
\ No newline at end of file
+    x1 = min(max(int(W * x1_k), 0), W)
+    y1 = min(max(int(H * y1_k), 0), H)
+    x2 = min(max(int(W * x2_k), 0), W)
+    y2 = min(max(int(H * y2_k), 0), H)
+    return x1, y1, x2, y2
+
+
+def _get_selector_rectangle(screen: WindowScreen, ratio: AspectRatio, roi_promt=PROMPT_ROI, newer_than: float = None):
+    rect = screen.roi_rect(ratio, roi_promt)
+    if rect is None:
+        return None, None
+    roi = screen.grab_gray_region(rect, newer_than)
+    if roi is None:
+        return None, None
+    return roi, rect
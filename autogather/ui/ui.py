@@ -8,15 +8,20 @@ import webbrowser
 from tkinter import ttk, messagebox
 from typing import Optional, Tuple, List
 
-from autogather.config import PROMPT_ROI, PRESET_ASPECT_RATIO, PRESET_SPEED, PRESET_DONT_MOVE, PRESET_WANT_GATHERING, \
+from autogather import metrics
+from autogather.capture import FrameGrabber
+from autogather.config import CAPTURE_THREAD_ENABLED, PROMPT_ROI, PRESET_ASPECT_RATIO, PRESET_SPEED, PRESET_DONT_MOVE, PRESET_WANT_GATHERING, \
     PRESET_TOL_X, PRESET_MULT_Y, PRESET_MULT_X, PRESET_TOL_Y, PRESET_MOVE_BACK_TO_START, PRESET_ADJUST_DIRECTION, \
-    PRESET_ADJUST_EVERY_CYCLE
+    PRESET_ADJUST_EVERY_CYCLE, PRESET_ROUTE, DEFAULT_ROUTE, PRESET_DIAG_MULT_X, PRESET_DIAG_MULT_Y, DIAGONAL_MULT, \
+    PRESET_MATCH_STRATEGY
 from autogather.debug import save_selector_debug
 from autogather.enums.aspect_ratio import AspectRatio
 from autogather.enums.direction import Direction
 from autogather.enums.gathering_speed import GatheringSpeedLevel
+from autogather.enums.match_strategy import MatchStrategy
 from autogather.enums.resource import Resource
-from autogather.folder_utils import scan_resources, load_resource_dir, _presets_path
+from autogather.folder_utils import scan_resources, load_resource_dir, _presets_path, _resource_strategy
+from autogather.model.calibration import Calibrator, MoveCalibration
 from autogather.model.resource_model import ResourceObject
 from autogather.model.worker import Worker
 from autogather.screen import WindowScreen, _get_selector_rectangle
@@ -40,6 +45,8 @@ class App:
 
         self.want_gathering = tk.BooleanVar(value=True)
         self.status = tk.StringVar(value="Select the 'resources' folder, choose a resource, and pick the game window.")
+        self.timings = tk.StringVar(value="")
+        self._timings_at = 0.0
 
         self.resource = None
         self._name_to_res: dict[str, Resource] = {}
@@ -49,21 +56,27 @@ class App:
         self._selected_win = tk.StringVar(value="")
 
         self.screen = None
+        self.grabber: Optional[FrameGrabber] = None
         self.worker: Optional[Worker] = None
+        self.calibrator: Optional[Calibrator] = None
         self.ts_f = self.ts_g = self.ts_s = self.ts_r = None
 
         self.mult_x = tk.DoubleVar(value=1.0)
         self.mult_y = tk.DoubleVar(value=1.0)
+        self.diag_mult_x = tk.DoubleVar(value=DIAGONAL_MULT)
+        self.diag_mult_y = tk.DoubleVar(value=DIAGONAL_MULT)
         self.tol_x = tk.IntVar(value=0)
         self.tol_y = tk.IntVar(value=0)
         self._updating_fields = False
 
         self.aspect_ratio = tk.StringVar(value=str(AspectRatio.from_preset()))
         self.gathering_speed = tk.StringVar(value=GatheringSpeedLevel.FAST.name)
+        self.match_strategy = tk.StringVar(value=str(_resource_strategy()))
         self.move_back_to_start = tk.BooleanVar(value=False)
         self.dont_move = tk.BooleanVar(value=False)
         self.adjust_every_cycle = tk.BooleanVar(value=False)
         self.adjust_dir = tk.StringVar(value=Direction.NONE.name)
+        self.route = tk.StringVar(value=DEFAULT_ROUTE)
 
         self._build_ui()
 
@@ -178,6 +191,12 @@ class App:
         self.move_back_to_start.trace_add("write", lambda *_: _sync_adjust_ui())
         _sync_adjust_ui()
 
+        # saved waypoint maps are per resource and start spot
+        ttk.Label(resource_card, text="Route (start spot)", style="Card.TLabel") \
+            .grid(row=5, column=0, sticky="w", pady=(8, 0))
+        ttk.Entry(resource_card, textvariable=self.route, width=20) \
+            .grid(row=5, column=1, columnspan=2, sticky="w", padx=(8, 0), pady=(8, 0))
+
         # params
         params_card = _card(shell, row=2, column=0, sticky="nsew", pady=(GUT, 0), padx=(0, GUT))
         ttk.Label(params_card, text="X multiplier", style="Card.TLabel").grid(row=0, column=0, sticky="w")
@@ -194,12 +213,29 @@ class App:
         ttk.Spinbox(params_card, style="Num.TSpinbox", from_=0, to=1000, increment=1, width=10,
                     textvariable=self.tol_y).grid(row=1, column=3, sticky="w", padx=(8, 0), pady=(8, 0))
 
-        ttk.Label(params_card, text="Gathering speed", style="Card.TLabel").grid(row=2, column=0, sticky="w",
+        # per-axis slowdown while both keys are held; 0 moves one axis at a time
+        ttk.Label(params_card, text="Diagonal X mult", style="Card.TLabel").grid(row=2, column=0, sticky="w",
+                                                                                 pady=(8, 0))
+        ttk.Spinbox(params_card, style="Num.TSpinbox", from_=0.0, to=3.0, increment=0.01, width=10,
+                    textvariable=self.diag_mult_x).grid(row=2, column=1, sticky="w", padx=(8, 12), pady=(8, 0))
+        ttk.Label(params_card, text="Diagonal Y mult", style="Card.TLabel").grid(row=2, column=2, sticky="w",
+                                                                                 pady=(8, 0))
+        ttk.Spinbox(params_card, style="Num.TSpinbox", from_=0.0, to=3.0, increment=0.01, width=10,
+                    textvariable=self.diag_mult_y).grid(row=2, column=3, sticky="w", padx=(8, 0), pady=(8, 0))
+
+        ttk.Label(params_card, text="Gathering speed", style="Card.TLabel").grid(row=3, column=0, sticky="w",
                                                                                  pady=(10, 0))
         self.speed_cmb = ttk.Combobox(params_card, style="Drop.TCombobox", state="readonly", width=16,
                                       textvariable=self.gathering_speed,
                                       values=[level.name for level in GatheringSpeedLevel])
-        self.speed_cmb.grid(row=2, column=1, sticky="w", padx=(8, 0), pady=(10, 0))
+        self.speed_cmb.grid(row=3, column=1, sticky="w", padx=(8, 0), pady=(10, 0))
+
+        ttk.Label(params_card, text="Resource matching", style="Card.TLabel").grid(row=4, column=0, sticky="w",
+                                                                                   pady=(10, 0))
+        ttk.Combobox(params_card, style="Drop.TCombobox", state="readonly", width=16,
+                     textvariable=self.match_strategy,
+                     values=[str(s) for s in MatchStrategy]).grid(row=4, column=1, sticky="w", padx=(8, 0),
+                                                                  pady=(10, 0))
 
         # ===== RIGHT column =====
         window_card = _card(shell, row=1, column=1, sticky="nsew")
@@ -226,6 +262,17 @@ class App:
             command=self._debug_selector_menu
         ).grid(row=1, column=0, sticky="w", padx=(0, 6), pady=(0, 6))
 
+        ttk.Button(
+            actions_card,
+            text="Calibrate movement",
+            command=self._calibrate_movement
+        ).grid(row=1, column=1, sticky="w", padx=(0, 6), pady=(0, 6))
+
+        ttk.Label(actions_card, text="Stage timings", style="Card.TLabel") \
+            .grid(row=2, column=0, sticky="w", pady=(6, 2))
+        ttk.Label(actions_card, textvariable=self.timings, style="Card.Mono.TLabel", justify="left") \
+            .grid(row=3, column=0, sticky="nw")
+
         # ===== Footer status bar =====
         footer = ttk.Frame(shell, padding=(8, 6))
         footer.grid(row=3, column=0, columnspan=2, sticky="ew", pady=(GUT, 0))
@@ -268,9 +315,38 @@ class App:
         save_selector_debug(self.screen.grab_bgr(), roi_tuple)
         self.status.set("Selector debug saved (roi_debug.png)")
 
+    def _calibrate_movement(self):
+        # stand next to a resource with room to walk around it; the fit is saved per aspect ratio
+        if (self.worker and self.worker.is_alive()) or (self.calibrator and self.calibrator.is_alive()):
+            return
+        if not self.resource:
+            messagebox.showerror("No resource", "Select a resource from the list.")
+            return
+        hwnd = self._selected_hwnd()
+        if not hwnd:
+            messagebox.showerror("No window", "Select a game window from the list.")
+            return
+        try:
+            ts_r = load_resource_dir(self.resource.folder_name, self.resource, self.get_match_strategy())[3]
+            self.screen = WindowScreen(hwnd)
+        except Exception as e:
+            messagebox.showerror("Loading error", str(e))
+            return
+        try:
+            bring_to_foreground(hwnd)
+        except Exception:
+            pass
+        self.calibrator = Calibrator(self.screen, ts_r, self.get_selected_aspect_ratio())
+        self.calibrator.start()
+        self.btn_start.configure(state="disabled")
+        self.btn_stop.configure(state="normal")
+
     def get_gathering_speed(self) -> GatheringSpeedLevel:
         return GatheringSpeedLevel[self.gathering_speed.get()]
 
+    def get_match_strategy(self) -> MatchStrategy:
+        return MatchStrategy.get_strategy(self.match_strategy.get())
+
     def get_direction(self) -> Direction:
         return Direction[self.adjust_dir.get()]
 
@@ -330,7 +406,8 @@ class App:
 
         resource_enum = self._name_to_res[name]
         try:
-            self.ts_f, self.ts_g, self.ts_s, self.ts_r = load_resource_dir(resource_enum.folder_name, resource_enum)
+            self.ts_f, self.ts_g, self.ts_s, self.ts_r = load_resource_dir(resource_enum.folder_name, resource_enum,
+                                                                           self.get_match_strategy())
         except Exception as e:
             messagebox.showerror("Loading error", str(e))
             return
@@ -355,16 +432,22 @@ class App:
             messagebox.showerror("Screen error", str(e))
             return
 
+        if CAPTURE_THREAD_ENABLED:
+            self.grabber = FrameGrabber(self.screen)
+            self.grabber.start()
+
         # Create main loop
         self.worker = Worker(
-            self.screen,
+            self.grabber or self.screen,
             self.ts_f, self.ts_g, self.ts_s, self.ts_r,
             self.want_gathering.get(),
             self.get_selected_aspect_ratio(),
             self.get_gathering_speed(),
             self.create_resource(),
             self.move_back_to_start.get(),
-            self.dont_move.get()
+            self.dont_move.get(),
+            self.route.get().strip() or DEFAULT_ROUTE,
+            MoveCalibration.load(self.get_selected_aspect_ratio())
         )
         self.worker.start()
         self.btn_start.configure(state="disabled")
@@ -374,12 +457,17 @@ class App:
     def create_resource(self):
         return ResourceObject(self.resource.folder_name, self.mult_x.get(), self.mult_y.get(), self.tol_x.get(),
                               self.tol_y.get(), self.resource.is_focus_needed, self.adjust_every_cycle.get(),
-                              self.get_direction())
+                              self.get_direction(), self.diag_mult_x.get(), self.diag_mult_y.get())
 
     def stop(self):
         if self.worker:
             self.worker.stop()
             self.worker = None
+        if self.calibrator:
+            self.calibrator.stop()
+        if self.grabber:
+            self.grabber.stop()
+            self.grabber = None
         self.btn_start.configure(state="normal")
         self.btn_stop.configure(state="disabled")
         self.status.set("Stopped.")
@@ -387,6 +475,15 @@ class App:
     def _tick(self):
         if self.worker:
             self.status.set(f"Status: {self.worker.state}")
+            if time.time() - self._timings_at > 1.0:
+                self._timings_at = time.time()
+                self.timings.set("\n".join(metrics.registry().lines()))
+        if self.calibrator:
+            self.status.set(f"Status: {self.calibrator.state}")
+            if not self.calibrator.is_alive():
+                self.calibrator = None
+                self.btn_start.configure(state="normal")
+                self.btn_stop.configure(state="disabled")
         self.root.after(150, self._tick)
 
     def _on_resource_selected(self, *_):
@@ -405,12 +502,17 @@ class App:
             if not resource_dict:
                 self.mult_x.set(res.get_mult_x())
                 self.mult_y.set(res.get_mult_y())
+                self.diag_mult_x.set(DIAGONAL_MULT)
+                self.diag_mult_y.set(DIAGONAL_MULT)
                 self.tol_x.set(res.get_tol_x())
                 self.tol_y.set(res.get_tol_y())
+                self.match_strategy.set(str(_resource_strategy()))
             else:
                 adjust_dir = resource_dict.get(PRESET_ADJUST_DIRECTION, Direction.NONE.name)
                 self.mult_x.set(resource_dict.get(PRESET_MULT_X, res.get_mult_x()))
                 self.mult_y.set(resource_dict.get(PRESET_MULT_Y, res.get_mult_y()))
+                self.diag_mult_x.set(resource_dict.get(PRESET_DIAG_MULT_X, DIAGONAL_MULT))
+                self.diag_mult_y.set(resource_dict.get(PRESET_DIAG_MULT_Y, DIAGONAL_MULT))
                 self.tol_x.set(resource_dict.get(PRESET_TOL_X, res.get_tol_x()))
                 self.tol_y.set(resource_dict.get(PRESET_TOL_Y, res.get_tol_y()))
                 self.want_gathering.set(resource_dict.get(PRESET_WANT_GATHERING, res.is_focus_needed))
@@ -419,6 +521,8 @@ class App:
                 self.dont_move.set(resource_dict.get(PRESET_DONT_MOVE, False))
                 self.adjust_dir.set(adjust_dir)
                 self.adjust_every_cycle.set(resource_dict.get(PRESET_ADJUST_EVERY_CYCLE, False))
+                self.route.set(resource_dict.get(PRESET_ROUTE, DEFAULT_ROUTE))
+                self.match_strategy.set(resource_dict.get(PRESET_MATCH_STRATEGY, str(_resource_strategy())))
         except Exception as e:
             print(f"Error: {e}")
 
@@ -433,6 +537,8 @@ class App:
         return {
             PRESET_MULT_X: float(self.mult_x.get()),
             PRESET_MULT_Y: float(self.mult_y.get()),
+            PRESET_DIAG_MULT_X: float(self.diag_mult_x.get()),
+            PRESET_DIAG_MULT_Y: float(self.diag_mult_y.get()),
             PRESET_TOL_X: int(self.tol_x.get()),
             PRESET_TOL_Y: int(self.tol_y.get()),
             PRESET_WANT_GATHERING: bool(self.want_gathering.get()),
@@ -441,6 +547,8 @@ class App:
             PRESET_SPEED: self.gathering_speed.get(),
             PRESET_ADJUST_DIRECTION: self.adjust_dir.get(),
             PRESET_ADJUST_EVERY_CYCLE: self.adjust_every_cycle.get(),
+            PRESET_ROUTE: self.route.get().strip() or DEFAULT_ROUTE,
+            PRESET_MATCH_STRATEGY: self.match_strategy.get(),
         }
 
     def _save_preset(self):
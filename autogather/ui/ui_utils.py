@@ -68,6 +68,7 @@ def _apply_style(root: tk.Tk, dark: bool):
     style.configure("Card.TFrame", background=pal["CARD"], borderwidth=1, relief="solid", bordercolor=pal["BRD"])
     style.configure("Card.TLabel", background=pal["CARD"], foreground=pal["TXT"])
     style.configure("Card.Muted.TLabel", background=pal["CARD"], foreground=pal["MUT"])
+    style.configure("Card.Mono.TLabel", background=pal["CARD"], foreground=pal["MUT"], font=("Consolas", 9))
     style.configure("Card.Section.TLabel", background=pal["CARD"], foreground=pal["TXT"], font=base_b)
 
     # ------ Checkbuttons (visible in dark)
@@ -0,0 +1,77 @@
+import json
+
+import numpy as np
+
+from autogather.enums import aspect_ratio
+from autogather.enums.aspect_ratio import AspectRatio
+from autogather.model import calibration
+from autogather.model.calibration import AxisFit, Calibrator, MoveCalibration
+
+
+def _presets_at(monkeypatch, path):
+    monkeypatch.setattr(calibration, "_presets_path", lambda: str(path))
+    monkeypatch.setattr(aspect_ratio, "_presets_path", lambda: str(path))
+
+
+def test_save_on_fresh_install_keeps_the_aspect_ratio_readable(tmp_path, monkeypatch):
+    path = tmp_path / "presets.json"
+    _presets_at(monkeypatch, path)
+    cal = MoveCalibration(AxisFit(2.0, 59.0, 4, 1.0), AxisFit(2.5, 37.5, 4, 1.0))
+    cal.save(AspectRatio.RATIO_21_9)
+    assert AspectRatio.get_ratio(str(AspectRatio.from_preset())) == AspectRatio.RATIO_21_9
+    assert MoveCalibration.load(AspectRatio.RATIO_21_9) == cal
+    assert "baru_ore" in json.loads(path.read_text(encoding="utf-8"))
+
+
+def test_preset_without_aspect_ratio_falls_back_to_16_9(tmp_path, monkeypatch):
+    path = tmp_path / "presets.json"
+    path.write_text(json.dumps({"move_calibration": {}}), encoding="utf-8")
+    _presets_at(monkeypatch, path)
+    assert AspectRatio.get_ratio(str(AspectRatio.from_preset())) == AspectRatio.RATIO_16_9
+
+
+def _samples(a, b, pxs):
+    return [(px, a * px + b) for px in pxs]
+
+
+def test_fit_drops_a_misread_move_and_refits():
+    samples = _samples(2.0, 60.0, [45, 47, 120, 118, 220, 222, 370, 368])
+    samples[3] = (400, samples[3][1])  # another node was read as this one
+    fit = AxisFit.fit(samples)
+    assert fit.samples == 7
+    assert abs(fit.a - 2.0) < 0.01 and abs(fit.b - 60.0) < 1.0
+
+
+def test_fit_refuses_when_too_few_moves_are_left(monkeypatch):
+    monkeypatch.setattr(calibration, "CALIBRATION_MIN_SAMPLES", 8)
+    samples = _samples(2.0, 60.0, [45, 47, 120, 118, 220, 222, 370, 368])
+    assert AxisFit.fit(samples) is not None
+    samples[3] = (400, samples[3][1])
+    assert AxisFit.fit(samples) is None
+
+
+class FakeMatcher:
+    def __init__(self, centers):
+        self.centers = centers
+
+    def find_all(self, gray, ts, scales, threshold):
+        return [{"box": ((x - 5, y - 5), (x + 5, y + 5)), "score": 0.9} for x, y in self.centers]
+
+
+class FakeScreen:
+    def grab_gray(self, newer_than=None):
+        return np.zeros((10, 10), dtype=np.uint8)
+
+
+def _calibrator(centers):
+    cal = Calibrator.__new__(Calibrator)
+    cal.screen, cal.ts_resource, cal._input_at = FakeScreen(), None, 0.0
+    cal.matcher = FakeMatcher(centers)
+    return cal
+
+
+def test_locate_follows_the_tracked_node():
+    cal = _calibrator([(600, 300), (200, 310)])
+    assert cal._locate() == (600, 300)
+    assert cal._locate((210, 300)) == (200, 310)
+    assert cal._locate((400, 300), max_px=80) is None
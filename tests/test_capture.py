@@ -0,0 +1,31 @@
+import numpy as np
+
+from autogather import clock
+from autogather.bench.capture import fake_screen
+from autogather.capture import FrameGrabber
+
+
+def _grabber():
+    # not started: frames only enter the ring through _store
+    screen, sct = fake_screen(320, 180)
+    return FrameGrabber(screen), screen, sct
+
+
+def test_latest_returns_none_when_no_frame_is_newer():
+    grabber, _, _ = _grabber()
+    grabber._store(clock.now() - 1.0, np.zeros((180, 320), np.uint8))
+    assert grabber.latest(newer_than=clock.now(), timeout=0.05) is None
+    assert grabber.latest(timeout=0.05) is not None
+
+
+def test_grab_falls_back_to_a_synchronous_grab_instead_of_a_stale_frame(monkeypatch):
+    grabber, screen, sct = _grabber()
+    stale = np.zeros((180, 320), np.uint8)
+    grabber._store(clock.now() - 1.0, stale)
+    monkeypatch.setattr(grabber, "latest", lambda newer_than=None: None)
+    fresh = grabber.grab_gray(newer_than=clock.now())
+    assert sct.grabs == 1
+    assert np.array_equal(fresh, screen.grab_gray())
+    roi = grabber.grab_gray_region((10, 20, 110, 70), newer_than=clock.now())
+    assert roi.shape == (50, 100)
+    assert np.array_equal(roi, screen.grab_gray()[20:70, 10:110])
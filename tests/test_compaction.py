@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from autogather.bench.corpus import _center_inside
+from autogather.bench.scenes import make_scene
+from autogather.config import RESOURCE_THRESHOLD, RESOURCES_ROOT_DEFAULT, SCALES
+from autogather.folder_utils import _resource_strategy
+from autogather.model.templates import TemplateSet
+
+
+def _dropped(full: TemplateSet, kept: TemplateSet):
+    return [t for t in full.tmps if not any(t.shape == k.shape and np.array_equal(t, k) for k in kept.tmps)]
+
+
+@pytest.mark.parametrize("resource", ["baru_ore", "baru_rich_ore", "glowing_mushroom", "slate"])
+def test_kept_templates_still_find_the_dropped_ones(resource):
+    directory = f"{RESOURCES_ROOT_DEFAULT}/{resource}/resource"
+    full = TemplateSet(directory, strategy=_resource_strategy())
+    kept = TemplateSet(directory, strategy=_resource_strategy(), compacted=True)
+    assert kept.compaction is not None and 0 < len(kept.tmps) < len(full.tmps)
+    dropped = _dropped(full, kept)
+    assert len(dropped) == kept.compaction.dropped
+    rng = np.random.default_rng(7)
+    for tmp in dropped:
+        for scale in (SCALES[1], SCALES[3], SCALES[5]):
+            frame, truth = make_scene(tmp, scale, 480, 320, rng)
+            if truth is None:
+                continue
+            hit = kept.best_match(frame, SCALES, RESOURCE_THRESHOLD)
+            assert hit is not None and hit["score"] >= RESOURCE_THRESHOLD, (resource, tmp.shape, scale)
+            assert _center_inside(hit["box"], truth)
@@ -0,0 +1,40 @@
+import time
+
+from autogather import metrics
+from autogather.enums.match_strategy import MatchStrategy
+from autogather.model.match_executor import MatchExecutor
+
+
+class SlowSet:
+    # one (template, scale) job that takes `sec`
+    strategy = MatchStrategy.FULL
+
+    def __init__(self, name: str, sec: float):
+        self.name = name
+        self.sec = sec
+        self.stats = {"pairs_tried": 0}
+
+    def plan(self, scales):
+        return [(0, 1.0)], True
+
+    def prepare(self, gray):
+        return gray
+
+    def match_pair(self, frame, idx, sc, threshold):
+        time.sleep(self.sec)
+        return True, None
+
+    def finish(self, best, full_scan):
+        pass
+
+
+def test_set_latency_is_its_own_not_the_slowest_before_it():
+    metrics.registry().reset()
+    ex = MatchExecutor(2)
+    try:
+        ex.best_matches(None, [SlowSet("slow", 0.3), SlowSet("fast", 0.0)], [1.0], 0.8)
+    finally:
+        ex.shutdown()
+    snap = metrics.registry().snapshot()
+    assert snap["match.slow"]["max_ms"] >= 250
+    assert snap["match.fast"]["max_ms"] < 100
@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from autogather import clock, input_sim
+from autogather.bench.capture import FakeMss
+from autogather.bench.scenes import noisy_background
+from autogather.enums.aspect_ratio import AspectRatio
+from autogather.enums.gathering_speed import GatheringSpeedLevel
+from autogather.enums.resource import Resource
+from autogather.folder_utils import load_resource_dir
+from autogather.model.resource_model import ResourceObject
+from autogather.model.worker import Worker
+from autogather.replay import RecordingInput
+from autogather.screen import WindowScreen
+
+W, H = 640, 360
+ORIGIN = (480, 320)
+
+
+class WorldMss(FakeMss):
+    # the camera follows the character: every grab sees the world shifted by the navigator position
+    def __init__(self, world):
+        super().__init__(world)
+        self.nav = None
+
+    def grab(self, mon):
+        return super().grab(dict(mon, left=mon["left"] + self.nav.pos_x, top=mon["top"] + self.nav.pos_y))
+
+
+@pytest.fixture
+def worker():
+    rng = np.random.default_rng(3)
+    gray = noisy_background(1600, 1000, rng)
+    sct = WorldMss(np.dstack([gray, gray, gray, np.full_like(gray, 255)]))
+    screen = WindowScreen(0, sct_factory=lambda: sct,
+                          rect_fn=lambda hwnd: (ORIGIN[0], ORIGIN[1], ORIGIN[0] + W, ORIGIN[1] + H))
+    res = Resource.BARU_ORE
+    # small tolerances, so the short test moves are walked
+    resource = ResourceObject(res.folder_name, res.get_mult_x(), res.get_mult_y(), 10, 10, res.is_focus_needed)
+    clock.install(clock.FastForwardClock())
+    input_sim.set_sink(RecordingInput())
+    try:
+        w = Worker(screen, *load_resource_dir(res.folder_name, res), True, AspectRatio.RATIO_16_9,
+                   GatheringSpeedLevel.FAST, resource, False, False)
+        sct.nav = w.nav
+        yield w
+    finally:
+        input_sim.set_sink(None)
+        clock.install(clock.RealClock())
+
+
+def _walk(worker, dx, dy):
+    start = (worker.nav.pos_x, worker.nav.pos_y)
+    worker._approach(dx, dy, False)
+    return worker.nav.pos_x - start[0], worker.nav.pos_y - start[1]
+
+
+def test_approach_keeps_a_move_the_view_confirms(worker):
+    assert worker.odometry is not None
+    moved = _walk(worker, 120, 0)
+    assert moved[0] > 0
+    assert worker.odometry.stats["corrected"] == 1
+    assert abs(worker.odometry.stats["last_error"][0]) <= 2
+
+
+def test_approach_reuses_a_copy_of_the_scan_frame(worker):
+    worker._frame = worker.screen.grab_gray().copy()
+    moved = _walk(worker, 0, -80)
+    assert moved[1] < 0
+    assert abs(worker.odometry.stats["last_error"][1]) <= 2
+    assert worker._frame is None
@@ -0,0 +1,25 @@
+import numpy as np
+
+from autogather.model.prompt_detector import PromptDetector, NO_PROMPT
+
+
+class CountingDetector(PromptDetector):
+    def __init__(self):
+        super().__init__(None, None, None, None)
+        self.matched = 0
+
+    def _match(self, roi):
+        self.matched += 1
+        return NO_PROMPT
+
+
+def test_new_geometry_version_is_not_served_from_the_reuse_gate():
+    roi = np.full((80, 260), 40, dtype=np.uint8)
+    det = CountingDetector()
+    det.detect(roi, 1)
+    det.detect(roi, 1)
+    assert det.matched == 1
+    det.detect(roi, 2)
+    assert det.matched == 2
+    det.detect(roi, 2)
+    assert det.matched == 2
@@ -0,0 +1,37 @@
+import time
+
+from autogather.enums.resource import Resource
+from autogather.model.navigator import Navigator
+from autogather.model.resource_model import ResourceObject
+from autogather.model.route_planner import RoutePlanner
+from autogather.model.waypoints import WaypointDB
+
+
+def _planner(respawn: float = 60.0):
+    res = Resource.BARU_ORE
+    nav = Navigator(ResourceObject(res.folder_name, res.get_mult_x(), res.get_mult_y(), 0, 0))
+    db = WaypointDB(respawn, learn=False)
+    return RoutePlanner(db, nav, 4.0), db
+
+
+def test_next_falls_back_to_a_ready_node_when_the_head_is_not():
+    planner, db = _planner()
+    now = time.time()
+    # next door and back in a few seconds, vs a long walk to one that is ready now
+    soon = db.add_or_update(60, 0, now - 57)
+    ready = db.add_or_update(2500, 2500, now - 600)
+    assert planner.replan((0, 0), now)[0] is soon
+    assert planner.next(0, 0) is ready
+    assert planner.next(0, 0) is None
+
+
+def test_travel_cache_only_holds_the_current_plan():
+    planner, db = _planner()
+    now = time.time()
+    for i in range(10):
+        db.add_or_update(i * 300, 0, now - 600)
+    planner.replan((0, 0), now)
+    first = set(planner._travel)
+    db.take(planner.plan[0])
+    planner.replan((0, 0), now)
+    assert planner._travel and len(planner._travel) <= len(first)
@@ -0,0 +1,75 @@
+import cv2
+import numpy as np
+
+from autogather.bench.capture import FakeMss, fake_screen
+from autogather.enums.aspect_ratio import AspectRatio
+from autogather.screen import WindowScreen, _get_selector_rectangle, selector_roi_rect
+
+
+class FlakyMss(FakeMss):
+    # fails the first `failures` grabs, like mss does when the window moved under it
+    def __init__(self, desktop, failures: int):
+        super().__init__(desktop)
+        self.failures = failures
+
+    def grab(self, mon):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("grab failed")
+        return super().grab(mon)
+
+
+def _gray(screen):
+    return cv2.cvtColor(screen.grab_bgr(), cv2.COLOR_BGR2GRAY)
+
+
+def test_roi_grab_equals_slice_of_full_grab():
+    screen, sct = fake_screen(1280, 720)
+    ratio = AspectRatio.RATIO_16_9
+    full = _gray(screen)
+    roi, rect = _get_selector_rectangle(screen, ratio)
+    x1, y1, x2, y2 = selector_roi_rect(1280, 720, ratio)
+    assert rect == (x1, y1, x2, y2)
+    assert np.array_equal(roi, full[y1:y2, x1:x2])
+    assert sct.pixels == 1280 * 720 + (x2 - x1) * (y2 - y1)
+
+
+def test_region_off_the_window_edge_is_clamped():
+    screen, sct = fake_screen(640, 360)
+    full = _gray(screen)
+    roi = screen.grab_gray_region((600, -20, 700, 50))
+    assert roi.shape == (50, 40)
+    assert np.array_equal(roi, full[0:50, 600:640])
+    assert screen.grab_gray_region((700, 0, 800, 50)) is None
+
+
+def test_failed_grab_is_retried_with_a_fresh_rect():
+    desktop = np.random.default_rng(1).integers(0, 256, (360, 640, 4), dtype=np.uint8)
+    sct = FlakyMss(desktop, failures=1)
+    rects = []
+
+    def rect_fn(hwnd):
+        rects.append(hwnd)
+        return 0, 0, 640, 360
+
+    screen = WindowScreen(0, sct_factory=lambda: sct, rect_fn=rect_fn)
+    gray = screen.grab_gray()
+    assert gray.shape == (360, 640)
+    assert np.array_equal(gray, cv2.cvtColor(desktop, cv2.COLOR_BGRA2GRAY))
+    assert sct.failures == 0
+    assert len(rects) == 2
+
+
+def test_resize_bumps_version_and_roi_rect():
+    desktop = np.zeros((720, 1280, 4), dtype=np.uint8)
+    size = [(0, 0, 1280, 720)]
+    screen = WindowScreen(0, sct_factory=lambda: FakeMss(desktop), rect_fn=lambda hwnd: size[0])
+    screen.geometry.refresh_sec = 0.0
+    ratio = AspectRatio.RATIO_16_9
+    assert screen.roi_rect(ratio) == selector_roi_rect(1280, 720, ratio)
+    version = screen.version
+    assert screen.roi_rect(ratio) == selector_roi_rect(1280, 720, ratio)
+    assert screen.version == version
+    size[0] = (0, 0, 960, 540)
+    assert screen.roi_rect(ratio) == selector_roi_rect(960, 540, ratio)
+    assert screen.version == version + 1
@@ -0,0 +1,21 @@
+from autogather.model.waypoints import WaypointDB
+
+
+def test_respawn_stats_ready_in_for_seen_and_gathered_nodes():
+    db = WaypointDB(60.0)
+    db.add_seen(1000, 0)
+    db.add_or_update(0, 0)
+    ready_in = {n["x"]: n["ready_in_sec"] for n in db.respawn_stats()["nodes"]}
+    assert ready_in[1000] is None
+    assert 0.0 <= ready_in[0] <= 60.0
+
+
+def test_release_requeues_without_learning():
+    db = WaypointDB(60.0)
+    n = db.add_or_update(0, 0, t=1.0)
+    db.take(n)
+    assert db.next_available(0, 0, remove=False) is None
+    db.release(n)
+    assert n.visits == 0 and n.misses == 0
+    assert n.last_collected == 1.0
+    assert db.respawn_stats()["resource"]["observations"] == 0
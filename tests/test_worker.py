@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from autogather import clock, input_sim
+from autogather.bench.capture import fake_screen
+from autogather.enums.aspect_ratio import AspectRatio
+from autogather.enums.gathering_speed import GatheringSpeedLevel
+from autogather.enums.resource import Resource
+from autogather.folder_utils import load_resource_dir
+from autogather.model.prompt_detector import PromptHits, NO_PROMPT
+from autogather.model.resource_model import ResourceObject
+from autogather.model.worker import Worker
+from autogather.replay import RecordingInput
+
+BOX = {"box": ((0, 0), (10, 10)), "score": 1.0}
+
+
+@pytest.fixture
+def worker():
+    screen, _ = fake_screen(640, 360)
+    res = Resource.BARU_ORE
+    resource = ResourceObject(res.folder_name, res.get_mult_x(), res.get_mult_y(), 10, 10, res.is_focus_needed)
+    clock.install(clock.FastForwardClock())
+    sink = RecordingInput()
+    input_sim.set_sink(sink)
+    try:
+        w = Worker(screen, *load_resource_dir(res.folder_name, res), True, AspectRatio.RATIO_16_9,
+                   GatheringSpeedLevel.FAST, resource, False, False)
+        w._approach = lambda *a, **k: None
+        w._wait_until = lambda *a, **k: False
+        w.sink = sink
+        yield w
+    finally:
+        input_sim.set_sink(None)
+        clock.install(clock.RealClock())
+
+
+def _node(worker):
+    n = worker.waypoints.add_or_update(0, 0, t=clock.now() - 100)
+    worker.waypoints.take(n)
+    return n
+
+
+def test_visit_on_cooldown_does_not_count_as_gathered(worker):
+    n = _node(worker)
+    collected = n.last_collected
+    worker._has_any_prompt = lambda: PromptHits(BOX, None, BOX)
+    worker._last_action = clock.now()
+    worker._visit(n)
+    assert not worker.gathered
+    assert not any(kind == "press" for _, kind, _ in worker.sink.events)
+    assert n.visits == 0 and n.last_collected == collected
+    assert worker.waypoints.next_available(0, 0, remove=False) is n
+
+
+def test_visit_without_prompt_is_an_empty_observation(worker):
+    n = _node(worker)
+    worker._has_any_prompt = lambda: NO_PROMPT
+    worker._visit(n)
+    assert not worker.gathered
+    assert n.visits + n.misses >= 1